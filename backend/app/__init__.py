@@ -1,38 +1,48 @@
+import re
 from pathlib import Path
-from urllib.parse import urlsplit
 
 from flask import Flask, request
 from flask_cors import CORS
 from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-from .config import Config
+from .config import Config, RuntimeConfig
+from .dispatch import start_enqueue_dispatcher
+from .expiry import start_expiry_sweeper
+from .json_provider import OrjsonProvider
+from .uploads import UploadRequest
+
+
+_CORS_VARY_HEADERS = ("Origin", "Access-Control-Request-Method", "Access-Control-Request-Headers")
+
+# "{scheme}://{host}[:port]" with nothing after the authority.
+_ORIGIN_RE = re.compile(r"(https?)://([^/?#]+)", re.IGNORECASE)
+
+
+def _normalize_origin(raw: str) -> str | None:
+    """
+    Normalize an origin string to the exact shape browsers send in the Origin header:
+    "{scheme}://{host}[:port]" with no trailing slash, path, query, or fragment.
+    """
+    candidate = (raw or "").strip().rstrip("/")
+    if not candidate:
+        return None
+
+    m = _ORIGIN_RE.fullmatch(candidate)
+    if not m:
+        return None
+
+    # Origin comparison should be case-insensitive for scheme/host.
+    # Keep the port (if any) because the browser includes it in Origin.
+    return f"{m.group(1).lower()}://{m.group(2).lower()}"
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
     app.config.from_object(Config)
-
-    def _normalize_origin(raw: str) -> str | None:
-        """
-        Normalize an origin string to the exact shape browsers send in the Origin header:
-        "{scheme}://{host}[:port]" with no trailing slash, path, query, or fragment.
-        """
-        candidate = (raw or "").strip().rstrip("/")
-        if not candidate:
-            return None
-
-        parts = urlsplit(candidate)
-        if parts.scheme.lower() not in {"http", "https"}:
-            return None
-        if not parts.netloc:
-            return None
-        if parts.path not in {"", "/"} or parts.query or parts.fragment:
-            return None
-
-        # Origin comparison should be case-insensitive for scheme/host.
-        # Keep the port (if any) because the browser includes it in Origin.
-        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+    app.request_class = UploadRequest
+    # orjson-backed jsonify(); always compact, regardless of debug mode.
+    app.json = OrjsonProvider(app)
 
     # CORS
     # - If CORS_ORIGINS is unset/empty, allow all origins (convenient for dev).
@@ -41,7 +51,7 @@ def create_app() -> Flask:
     cors_origins_raw = (app.config.get("CORS_ORIGINS") or "").strip()
     if cors_origins_raw:
         normalized = [_normalize_origin(o) for o in cors_origins_raw.split(",")]
-        origins = sorted({o for o in normalized if o})
+        origins = tuple(sorted({o for o in normalized if o}))
         if not origins:
             raise RuntimeError("CORS_ORIGINS was set but contained no valid origins.")
         app.logger.info("CORS enabled for /api/* origins: %s", ", ".join(origins))
@@ -75,7 +85,6 @@ def create_app() -> Flask:
             send_wildcard=True,
         )
 
-    @app.after_request
     def _ensure_cors_vary_headers(resp):
         """
         Prevent proxy/CDN caching from mixing CORS responses across origins.
@@ -86,11 +95,15 @@ def create_app() -> Flask:
           Origin: https://quick-pdf.netlify.app
         which will hard-fail CORS in browsers.
         """
-        if request.path.startswith("/api/") and request.headers.get("Origin"):
+        # Only needed with an origin allow-list; the dev wildcard ("*") response
+        # is identical for every origin, so there is nothing to mix up.
+        if cors_origins_raw and request.path.startswith("/api/") and request.headers.get("Origin"):
             vary = resp.headers.get("Vary", "")
-            parts = {p.strip() for p in vary.split(",") if p.strip()} if vary else set()
-            parts.update({"Origin", "Access-Control-Request-Method", "Access-Control-Request-Headers"})
-            resp.headers["Vary"] = ", ".join(sorted(parts))
+            # Fast path: flask-cors usually emitted the full set already.
+            if not (vary and all(h in vary for h in _CORS_VARY_HEADERS)):
+                parts = {p.strip() for p in vary.split(",") if p.strip()} if vary else set()
+                parts.update(_CORS_VARY_HEADERS)
+                resp.headers["Vary"] = ", ".join(sorted(parts))
 
         # Preflight responses are safe to cache in the browser (Max-Age),
         # but should generally not be cached by shared intermediaries.
@@ -99,6 +112,8 @@ def create_app() -> Flask:
 
         return resp
 
+    app.after_request(_ensure_cors_vary_headers)
+
     # Respect X-Forwarded-* headers from nginx so request.remote_addr is meaningful.
     # docker-compose/nginx sets X-Forwarded-For and X-Forwarded-Proto.
     app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)  # type: ignore[assignment]
@@ -117,6 +132,16 @@ def create_app() -> Flask:
     jobs_dir.mkdir(parents=True, exist_ok=True)
     app.config["JOBS_DIR"] = str(jobs_dir)
 
+    # Typed snapshot of hot-path settings (see RuntimeConfig).
+    app.extensions["quickpdf_cfg"] = RuntimeConfig.from_mapping(app.config)
+
+    # Expired job records/outputs are removed in the background rather than
+    # checked on every poll.
+    start_expiry_sweeper(app)
+
+    # Accepted jobs are handed to RQ by a background dispatcher.
+    start_enqueue_dispatcher(app)
+
     from .routes import main
 
     # API lives under /api (nginx proxies /api -> backend)
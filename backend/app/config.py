@@ -1,5 +1,11 @@
+from __future__ import annotations
+
 import os
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Mapping
+
+from flask import current_app
 
 
 class Config:
@@ -18,6 +24,14 @@ class Config:
 
     ALLOWED_EXTENSIONS = {"pdf"}
 
+    # Read size (bytes) for the multipart parser (Werkzeug's default is 64KB).
+    # Capped at half of Flask's MAX_FORM_MEMORY_SIZE.
+    UPLOAD_PARSE_CHUNK = int(os.environ.get("UPLOAD_PARSE_CHUNK", str(256 * 1024)))  # 256KB
+    # Chunk size (bytes) used when copying an upload stream to disk.
+    UPLOAD_COPY_CHUNK = int(os.environ.get("UPLOAD_COPY_CHUNK", str(1024 * 1024)))  # 1MB
+    # Max threads used to validate and write merge uploads concurrently.
+    MERGE_SAVE_PARALLELISM = int(os.environ.get("MERGE_SAVE_PARALLELISM", "4"))
+
     # Basic safety limits (tune as needed)
     MAX_PDF_PAGES = int(os.environ.get("MAX_PDF_PAGES", "200"))
     MAX_MERGE_FILES = int(os.environ.get("MAX_MERGE_FILES", "10"))
@@ -30,9 +44,6 @@ class Config:
     RATE_LIMIT_POLL_PER_WINDOW = int(os.environ.get("RATE_LIMIT_POLL_PER_WINDOW", "120"))
     RATE_LIMIT_DOWNLOAD_PER_WINDOW = int(os.environ.get("RATE_LIMIT_DOWNLOAD_PER_WINDOW", "60"))
 
-    # Internal worker URL (docker-compose service name by default)
-    WORKER_URL = os.environ.get("WORKER_URL", "http://worker:8001")
-
     # Job queue directory (shared volume between backend+worker in Docker).
     DEFAULT_JOBS_DIR = Path(__file__).resolve().parents[1] / "jobs"
     JOBS_DIR = os.environ.get("JOBS_DIR", str(DEFAULT_JOBS_DIR))
@@ -40,6 +51,10 @@ class Config:
     # RQ / Redis
     REDIS_URL = os.environ.get("REDIS_URL", "redis://redis:6379/0")
     RQ_QUEUE_NAME = os.environ.get("RQ_QUEUE_NAME", "pdf")
+    # Per-process Redis connection pool size, and the connect/read timeout (also
+    # how long a caller waits for a free pooled connection).
+    REDIS_MAX_CONNECTIONS = int(os.environ.get("REDIS_MAX_CONNECTIONS", "64"))
+    REDIS_SOCKET_TIMEOUT_S = float(os.environ.get("REDIS_SOCKET_TIMEOUT_S", "5"))
 
     # Worker safety defaults (seconds)
     RQ_JOB_TIMEOUT_S = int(os.environ.get("RQ_JOB_TIMEOUT_S", "180"))
@@ -50,4 +65,76 @@ class Config:
     JOB_TTL_S = int(os.environ.get("JOB_TTL_S", "3600"))  # 1 hour
     DELETE_OUTPUT_AFTER_DOWNLOAD = os.environ.get("DELETE_OUTPUT_AFTER_DOWNLOAD", "0").strip() not in {"0", "false", "False", "no", "NO"}
 
+    # Serve downloads via nginx (X-Accel-Redirect to an `internal` location that
+    # aliases UPLOAD_FOLDER) instead of streaming the file through Python.
+    # Leave off when the backend isn't behind the bundled nginx config.
+    USE_XACCEL = os.environ.get("USE_XACCEL", "0").strip() not in {"0", "false", "False", "no", "NO"}
+    XACCEL_PREFIX = os.environ.get("XACCEL_PREFIX", "/_protected/")
+
+
+@dataclass(frozen=True, slots=True)
+class RuntimeConfig:
+    """
+    Typed snapshot of the settings read on hot request paths.
+
+    Built once by create_app() (after paths are resolved) and stored on
+    app.extensions["quickpdf_cfg"], so handlers do one attribute lookup instead
+    of current_app.config.get(...) + int() on every request. Config changes made
+    after create_app() are not picked up.
+    """
+
+    upload_dir: Path
+    allowed_extensions: frozenset[str]
+    upload_parse_chunk: int
+    upload_copy_chunk: int
+    merge_save_parallelism: int
+    max_pdf_pages: int
+    max_merge_files: int
+    max_merge_total_pages: int
+    max_operation_pages: int
+    rate_limit_window_s: int
+    rate_limit_jobs_per_window: int
+    rate_limit_poll_per_window: int
+    rate_limit_download_per_window: int
+    rq_job_timeout_s: int
+    job_ttl_s: int
+    delete_output_after_download: bool
+    use_xaccel: bool
+    xaccel_prefix: str
+
+    @classmethod
+    def from_mapping(cls, config: Mapping[str, Any]) -> RuntimeConfig:
+        def as_int(key: str) -> int:
+            return int(config.get(key, getattr(Config, key)))
+
+        try:
+            job_ttl_s = as_int("JOB_TTL_S")
+        except Exception:
+            job_ttl_s = 3600
+
+        return cls(
+            upload_dir=Path(config["UPLOAD_FOLDER"]),
+            allowed_extensions=frozenset(config.get("ALLOWED_EXTENSIONS", Config.ALLOWED_EXTENSIONS)),
+            upload_parse_chunk=as_int("UPLOAD_PARSE_CHUNK"),
+            upload_copy_chunk=as_int("UPLOAD_COPY_CHUNK"),
+            merge_save_parallelism=as_int("MERGE_SAVE_PARALLELISM"),
+            max_pdf_pages=as_int("MAX_PDF_PAGES"),
+            max_merge_files=as_int("MAX_MERGE_FILES"),
+            max_merge_total_pages=as_int("MAX_MERGE_TOTAL_PAGES"),
+            max_operation_pages=as_int("MAX_OPERATION_PAGES"),
+            rate_limit_window_s=as_int("RATE_LIMIT_WINDOW_S"),
+            rate_limit_jobs_per_window=as_int("RATE_LIMIT_JOBS_PER_WINDOW"),
+            rate_limit_poll_per_window=as_int("RATE_LIMIT_POLL_PER_WINDOW"),
+            rate_limit_download_per_window=as_int("RATE_LIMIT_DOWNLOAD_PER_WINDOW"),
+            rq_job_timeout_s=as_int("RQ_JOB_TIMEOUT_S"),
+            job_ttl_s=max(60, job_ttl_s),  # never less than 60s
+            delete_output_after_download=bool(
+                config.get("DELETE_OUTPUT_AFTER_DOWNLOAD", Config.DELETE_OUTPUT_AFTER_DOWNLOAD)
+            ),
+            use_xaccel=bool(config.get("USE_XACCEL", Config.USE_XACCEL)),
+            xaccel_prefix="/" + str(config.get("XACCEL_PREFIX", Config.XACCEL_PREFIX)).strip("/") + "/",
+        )
+
 
+def get_runtime_config() -> RuntimeConfig:
+    return current_app.extensions["quickpdf_cfg"]
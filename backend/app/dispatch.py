@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import atexit
+import os
+import queue
+import threading
+import time
+
+from flask import Flask
+from rq import Queue
+
+from .config import get_runtime_config
+from .jobs_store import atomic_write_json, get_job_paths, read_json
+from .queue import get_queue
+
+# Jobs handed to one enqueue_many() call (a single pipelined Redis round trip).
+_BATCH_MAX = 32
+_ENQUEUE_ATTEMPTS = 3
+_RETRY_BACKOFF_S = 0.2
+
+QUEUE_UNAVAILABLE_MESSAGE = "Queue unavailable. Try again later."
+
+
+class EnqueueDispatcher:
+    """
+    Moves the RQ enqueue off the request path.
+
+    create_job() writes the job record, calls submit() and returns 202; a daemon
+    thread drains the local queue and enqueues pending jobs to RQ in batches.
+    If Redis stays unreachable, the job is marked status="error" (the client sees
+    it on its next poll) and its uploaded inputs are removed.
+    """
+
+    def __init__(self, app: Flask) -> None:
+        self._app = app
+        self._pending: queue.Queue[tuple[str, int, list[str]]] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="quickpdf-enqueue", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+        # Best effort: don't leave accepted jobs "queued" forever on a clean shutdown.
+        atexit.register(self.flush)
+
+    def submit(self, job_id: str, *, timeout_s: int, input_paths: list[str]) -> None:
+        self._pending.put((job_id, timeout_s, input_paths))
+
+    def flush(self) -> None:
+        batch = self._drain(block=False)
+        while batch:
+            self._dispatch(batch)
+            batch = self._drain(block=False)
+
+    def _drain(self, *, block: bool) -> list[tuple[str, int, list[str]]]:
+        batch = []
+        try:
+            batch.append(self._pending.get(block=block))
+            while len(batch) < _BATCH_MAX:
+                batch.append(self._pending.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._drain(block=True)
+            try:
+                self._dispatch(batch)
+            except Exception:  # noqa: BLE001
+                self._app.logger.exception("Enqueue dispatcher failed.")
+
+    def _dispatch(self, batch: list[tuple[str, int, list[str]]]) -> None:
+        with self._app.app_context():
+            # The job record is the source of truth for status/results, so RQ
+            # needn't keep a finished job around (result_ttl=0); failures are
+            # kept only as long as the record, for debugging.
+            failure_ttl = get_runtime_config().job_ttl_s
+            for attempt in range(1, _ENQUEUE_ATTEMPTS + 1):
+                try:
+                    get_queue().enqueue_many(
+                        [
+                            Queue.prepare_data(
+                                "tasks.process_job",
+                                (job_id,),
+                                timeout=timeout_s,
+                                result_ttl=0,
+                                failure_ttl=failure_ttl,
+                            )
+                            for job_id, timeout_s, _inputs in batch
+                        ]
+                    )
+                    return
+                except Exception:  # noqa: BLE001
+                    if attempt == _ENQUEUE_ATTEMPTS:
+                        self._app.logger.exception("Failed to enqueue %d job(s) to RQ.", len(batch))
+                    else:
+                        time.sleep(_RETRY_BACKOFF_S * attempt)
+
+            for job_id, _timeout_s, input_paths in batch:
+                _fail_job(job_id, input_paths)
+
+
+def _fail_job(job_id: str, input_paths: list[str]) -> None:
+    # Best-effort: remove the uploads and tell the poller why the job won't run.
+    for p in input_paths:
+        try:
+            os.unlink(p)
+        except OSError:
+            pass
+
+    job_file = get_job_paths().job_file(job_id)
+    try:
+        job = read_json(job_file)
+    except Exception:  # noqa: BLE001
+        return
+    job["status"] = "error"
+    job["error_message"] = QUEUE_UNAVAILABLE_MESSAGE
+    job["updated_at"] = time.time()
+    try:
+        atomic_write_json(job_file, job)
+    except Exception:  # noqa: BLE001
+        pass
+
+
+def start_enqueue_dispatcher(app: Flask) -> EnqueueDispatcher:
+    dispatcher = EnqueueDispatcher(app)
+    dispatcher.start()
+    app.extensions["quickpdf_dispatcher"] = dispatcher
+    return dispatcher
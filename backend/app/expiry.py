@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+
+import orjson
+from flask import Flask
+
+from .config import get_runtime_config
+from .uploads import UPLOAD_TMP_PREFIX
+
+
+def cleanup_job_artifacts(*, job_file: Path, job: dict, upload_dir: Path) -> None:
+    # Best-effort removal of output file + job record.
+    output_filename = str(job.get("output_filename") or "").strip()
+    if output_filename:
+        try:
+            (upload_dir / output_filename).unlink(missing_ok=True)
+        except Exception:
+            pass
+
+    try:
+        job_file.unlink(missing_ok=True)
+    except Exception:
+        pass
+
+
+def sweep_expired(*, jobs_dir: Path, upload_dir: Path, ttl_s: int, now: float | None = None) -> int:
+    """
+    Remove job records (and their outputs) older than ttl_s. Returns the count removed.
+
+    Expiry is measured from the record's created_at. A record's mtime is never
+    earlier than that, so an mtime past the TTL means expired on the stat alone;
+    any later rewrite (worker finishing, download count) moves mtime forward, so
+    everything else still needs created_at read from the record. Records that
+    can't be parsed are removed once their mtime is past the TTL.
+    """
+    now = time.time() if now is None else now
+    removed = 0
+
+    with os.scandir(jobs_dir) as it:
+        for entry in it:
+            # Skip in-flight "*.json.tmp" files and anything else that isn't a record.
+            if not entry.name.endswith(".json"):
+                continue
+            job_file = Path(entry.path)
+            try:
+                if not entry.is_file():
+                    continue
+                mtime_expired = (now - entry.stat().st_mtime) > ttl_s
+            except OSError:
+                continue
+            try:
+                job = orjson.loads(job_file.read_bytes())
+            except FileNotFoundError:
+                continue
+            except Exception:
+                job = None
+            if not isinstance(job, dict):
+                # Unreadable record: nothing to trust but the file's own age.
+                job = {}
+            try:
+                created_expired = (now - float(job.get("created_at"))) > ttl_s
+            except (TypeError, ValueError):
+                created_expired = False
+            if mtime_expired or created_expired:
+                cleanup_job_artifacts(job_file=job_file, job=job, upload_dir=upload_dir)
+                removed += 1
+
+    # Upload temp files are removed when their request closes; anything this old
+    # was left behind by a killed process.
+    with os.scandir(upload_dir) as it:
+        for entry in it:
+            if not entry.name.startswith(UPLOAD_TMP_PREFIX):
+                continue
+            try:
+                if (now - entry.stat().st_mtime) > ttl_s:
+                    os.unlink(entry.path)
+            except OSError:
+                pass
+
+    return removed
+
+
+def start_expiry_sweeper(app: Flask) -> threading.Thread:
+    """
+    Run sweep_expired() every max(60, ttl // 10) seconds on a daemon thread, so
+    request handlers don't have to check expiry on every poll. Each server process
+    runs its own sweeper; concurrent sweeps only race on unlink(missing_ok=True).
+    """
+    with app.app_context():
+        cfg = get_runtime_config()
+    jobs_dir = Path(app.config["JOBS_DIR"])
+    interval_s = max(60, cfg.job_ttl_s // 10)
+
+    def _run() -> None:
+        while True:
+            try:
+                sweep_expired(jobs_dir=jobs_dir, upload_dir=cfg.upload_dir, ttl_s=cfg.job_ttl_s)
+            except Exception:  # noqa: BLE001
+                app.logger.exception("Job expiry sweep failed")
+            time.sleep(interval_s)
+
+    thread = threading.Thread(target=_run, name="quickpdf-expiry-sweeper", daemon=True)
+    thread.start()
+    return thread
@@ -1,19 +1,33 @@
 from __future__ import annotations
 
-import json
+import mmap
+import os
+import threading
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+import orjson
 from flask import current_app
 
 
+# Parsed job records keyed by path, validated against (inode, mtime_ns, size).
+# Writers always os.replace() the file, so any update invalidates the entry.
+_READ_CACHE_MAX = 1024
+_read_cache: OrderedDict[str, tuple[tuple[int, int, int], dict[str, Any]]] = OrderedDict()
+_read_cache_lock = threading.Lock()
+
+# Job records at least this large are parsed from an mmap instead of a read().
+_MMAP_MIN_SIZE = 4096
+
+
 def _now_ts() -> float:
     return time.time()
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class JobPaths:
     root: Path
 
@@ -26,15 +40,66 @@ def get_job_paths() -> JobPaths:
     return JobPaths(root=jobs_dir)
 
 
+def _dump_json(payload: dict[str, Any]) -> bytes:
+    return orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+
+
+def _write_fd(path: Path, data: bytes, flags: int) -> None:
+    fd = os.open(path, os.O_WRONLY | flags, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
 def atomic_write_json(path: Path, payload: dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
+    # JOBS_DIR is created once by create_app(); no per-write mkdir.
     tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
-    tmp.replace(path)
+    _write_fd(tmp, _dump_json(payload), os.O_CREAT | os.O_TRUNC)
+    os.replace(tmp, path)
+
+
+def create_json(path: Path, payload: dict[str, Any]) -> None:
+    """
+    Write a brand-new record in place (no temp file + rename).
+    Nothing can be reading a job file before its job_id has been handed out,
+    so the atomic swap is unnecessary; O_EXCL guards against reusing an id.
+    """
+    _write_fd(path, _dump_json(payload), os.O_CREAT | os.O_EXCL)
+
+
+def _load_json_file(path: Path, size: int) -> dict[str, Any]:
+    with open(path, "rb", buffering=0) as f:
+        if size < _MMAP_MIN_SIZE:
+            return orjson.loads(f.read())
+        # orjson parses straight from the mapped page cache (no bytes copy).
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
 
 
 def read_json(path: Path) -> dict[str, Any]:
-    return json.loads(path.read_text(encoding="utf-8"))
+    """
+    Read a job record, skipping the read+parse when the file is unchanged.
+    Returns a shallow copy: callers may set/pop top-level keys freely.
+    """
+    st = os.stat(path)
+    sig = (st.st_ino, st.st_mtime_ns, st.st_size)
+    key = str(path)
+    with _read_cache_lock:
+        hit = _read_cache.get(key)
+        if hit is not None and hit[0] == sig:
+            _read_cache.move_to_end(key)
+            return dict(hit[1])
+
+    payload = _load_json_file(path, st.st_size)
+    with _read_cache_lock:
+        _read_cache[key] = (sig, payload)
+        _read_cache.move_to_end(key)
+        while len(_read_cache) > _READ_CACHE_MAX:
+            _read_cache.popitem(last=False)
+    return dict(payload)
 
 
 def create_job_record(
@@ -46,6 +111,7 @@ def create_job_record(
     output_download_name: str,
     pages: list[str] | None,
     download_token_hash: str,
+    input_sha256: list[str] | None = None,
 ) -> dict[str, Any]:
     ts = _now_ts()
     job: dict[str, Any] = {
@@ -53,6 +119,8 @@ def create_job_record(
         "status": "queued",
         "operation": operation,
         "input_filenames": input_filenames,
+        # SHA-256 (hex) of each input, same order as input_filenames.
+        "input_sha256": input_sha256 or [],
         "output_filename": output_filename,
         "output_download_name": output_download_name,
         "pages": pages or [],
@@ -69,7 +137,7 @@ def create_job_record(
 def enqueue_job(job: dict[str, Any]) -> None:
     paths = get_job_paths()
     job_id = str(job["job_id"])
-    atomic_write_json(paths.job_file(job_id), job)
+    create_json(paths.job_file(job_id), job)
     # Enqueueing to Redis/RQ is handled separately in the API layer.
 
 
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+# Datetimes go through Flask's `default` so they keep the RFC 822 format.
+_DUMPS_OPTS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson, so jsonify()/dict returns skip the stdlib encoder.
+
+    Keeps Flask's behaviour where it matters to clients: sorted keys, and the
+    same fallback (`default`) for types orjson doesn't handle natively. Output is
+    always compact UTF-8; non-ASCII is not escaped.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            # Indent/separators etc. were requested explicitly; use the stdlib path.
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=_DUMPS_OPTS).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=_DUMPS_OPTS)
+        return self._app.response_class(body, mimetype=self.mimetype)
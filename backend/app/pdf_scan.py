@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import re
+from typing import IO
+
+# How much of the file end to read looking for "trailer ... startxref N %%EOF".
+_TAIL_BYTES = 4096
+# Enough to hold the catalog / root page-tree dictionary of any sane PDF.
+_OBJ_READ_BYTES = 4096
+# Give up on xref tables with more subsections than this.
+_MAX_XREF_SECTIONS = 256
+# Whitespace allowed between the last xref entry and the "trailer" keyword.
+_MAX_TRAILER_GAP = 16
+
+_STARTXREF_RE = re.compile(rb"startxref\s+(\d+)\s+%%EOF")
+_ROOT_RE = re.compile(rb"/Root\s+(\d+)\s+(\d+)\s+R")
+_PAGES_RE = re.compile(rb"/Pages\s+(\d+)\s+(\d+)\s+R")
+# A direct integer only; "/Count 12 0 R" (indirect) must not match as 12.
+_COUNT_RE = re.compile(rb"/Count\s+(\d+)(?![\d\s]*R)")
+_XREF_SECTION_RE = re.compile(rb"\s*(\d+) (\d+)[ \t]*(?:\r\n|\r|\n)")
+_XREF_ENTRY_RE = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+
+
+def scan_page_count(stream: IO[bytes]) -> int | None:
+    """
+    Read the page count from the root page tree's /Count without a full parse.
+
+    Follows trailer /Root -> catalog /Pages -> /Count using only the classic
+    xref table, reading a few KB from the end of the file plus the two objects.
+    Returns None for anything it doesn't handle (xref streams, incremental
+    updates, encryption, linearized files, odd layouts); callers then fall back
+    to a real parser.
+    Leaves the stream position undefined.
+    """
+    stream.seek(0, 2)
+    size = stream.tell()
+    tail_len = min(size, _TAIL_BYTES)
+    stream.seek(size - tail_len)
+    tail = stream.read(tail_len)
+
+    startxref = None
+    for startxref in _STARTXREF_RE.finditer(tail):
+        pass
+    if startxref is None:
+        return None
+
+    trailer_at = tail.rfind(b"trailer", 0, startxref.start())
+    if trailer_at < 0:
+        return None
+    trailer = tail[trailer_at : startxref.start()]
+    if b"/Prev" in trailer or b"/Encrypt" in trailer:
+        return None
+    root = _ROOT_RE.search(trailer)
+    if root is None:
+        return None
+
+    xref_offset = int(startxref.group(1))
+    trailer_offset = size - tail_len + trailer_at
+
+    # Walk the subsection headers of the table at startxref. It must run right up
+    # to the trailer parsed above, so that trailer really is this table's; that
+    # rules out linearized files, whose startxref points at the first-page table.
+    stream.seek(xref_offset)
+    if stream.read(4) != b"xref":
+        return None
+    sections: list[tuple[int, int, int]] = []
+    pos = xref_offset + 4
+    for _ in range(_MAX_XREF_SECTIONS):
+        stream.seek(pos)
+        m = _XREF_SECTION_RE.match(stream.read(64))
+        if m is None:
+            break
+        first, count = int(m.group(1)), int(m.group(2))
+        sections.append((first, count, pos + m.end()))
+        pos += m.end() + count * 20
+    else:
+        return None
+    if not sections or not 0 <= trailer_offset - pos <= _MAX_TRAILER_GAP:
+        return None
+    stream.seek(pos)
+    if stream.read(trailer_offset - pos).strip():
+        return None
+
+    def object_offset(num: int) -> int | None:
+        for first, count, entries_at in sections:
+            if first <= num < first + count:
+                stream.seek(entries_at + (num - first) * 20)
+                entry = _XREF_ENTRY_RE.match(stream.read(20))
+                if entry is None or entry.group(3) != b"n":
+                    return None
+                return int(entry.group(1))
+        return None
+
+    def read_object(num: int, gen: int) -> bytes | None:
+        offset = object_offset(num)
+        if offset is None:
+            return None
+        stream.seek(offset)
+        buf = stream.read(_OBJ_READ_BYTES)
+        header = re.match(rb"\s*%d\s+%d\s+obj" % (num, gen), buf)
+        end = buf.find(b"endobj")
+        if header is None or end < 0:
+            return None
+        return buf[header.end() : end]
+
+    catalog = read_object(int(root.group(1)), int(root.group(2)))
+    if catalog is None:
+        return None
+    pages_ref = _PAGES_RE.search(catalog)
+    if pages_ref is None:
+        return None
+    pages = read_object(int(pages_ref.group(1)), int(pages_ref.group(2)))
+    if pages is None:
+        return None
+    count = _COUNT_RE.search(pages)
+    if count is None:
+        return None
+    return int(count.group(1))
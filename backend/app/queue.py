@@ -1,12 +1,30 @@
 from __future__ import annotations
 
-from redis import Redis
+from redis import BlockingConnectionPool, Redis
 from rq import Queue
 from flask import current_app
 
 
 def get_redis() -> Redis:
-    return Redis.from_url(current_app.config["REDIS_URL"])
+    # One client (and connection pool) per app; Redis clients are thread-safe.
+    client = current_app.extensions.get("redis")
+    if client is None:
+        config = current_app.config
+        socket_timeout_s = float(config["REDIS_SOCKET_TIMEOUT_S"])
+        # Bounded keep-alive pool: callers wait briefly for a free connection
+        # instead of opening an unbounded number under load.
+        pool = BlockingConnectionPool.from_url(
+            config["REDIS_URL"],
+            max_connections=int(config["REDIS_MAX_CONNECTIONS"]),
+            timeout=socket_timeout_s,
+            socket_timeout=socket_timeout_s,
+            socket_connect_timeout=socket_timeout_s,
+            socket_keepalive=True,
+            health_check_interval=30,
+        )
+        client = Redis(connection_pool=pool)
+        current_app.extensions["redis"] = client
+    return client
 
 
 def get_queue() -> Queue:
@@ -1,13 +1,46 @@
 from __future__ import annotations
 
+import math
 import time
 from dataclasses import dataclass
 from typing import Callable
 
-from flask import current_app, jsonify, request
+from flask import current_app, request
 
 from .queue import get_redis
 
+_TOO_MANY_REQUESTS_BODY = b'{"message":"Too many requests. Please slow down."}'
+
+# Token bucket in one round trip. State per key is a hash {t: tokens, ts: last refill ms}.
+# ARGV: capacity, refill rate (tokens per ms), now (ms), cost. Returns {allowed, wait_ms}.
+_TOKEN_BUCKET_LUA = """
+local cap = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local b = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(b[1])
+local ts = tonumber(b[2])
+if tokens == nil or ts == nil then
+  tokens = cap
+  ts = now
+elseif now > ts then
+  tokens = math.min(cap, tokens + (now - ts) * rate)
+  ts = now
+end
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  wait = math.ceil((cost - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'ts', tostring(ts))
+redis.call('PEXPIRE', KEYS[1], math.ceil(cap / rate) + 1000)
+return {allowed, wait}
+"""
+
 
 def _client_ip() -> str:
     # With ProxyFix enabled, request.remote_addr should already reflect the real client.
@@ -16,53 +49,71 @@ def _client_ip() -> str:
     return xff or (request.remote_addr or "unknown")
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RateLimit:
     key: str
     limit: int
     window_s: int
 
 
-def _fixed_window_key(rl: RateLimit, *, ip: str, now: float) -> str:
-    bucket = int(now // rl.window_s)
-    return f"rl:{rl.key}:{ip}:{bucket}"
+def _bucket_key(rl: RateLimit, *, ip: str) -> str:
+    # Braces make the whole key the Redis Cluster hash tag; the script only
+    # touches this one key, so any slot is fine.
+    return f"rl:{{{rl.key}:{ip}}}"
+
 
+def _token_bucket_script(r):
+    script = current_app.extensions.get("_rate_limit_script")
+    if script is None:
+        script = r.register_script(_TOKEN_BUCKET_LUA)
+        current_app.extensions["_rate_limit_script"] = script
+    return script
 
-def check_rate_limit(rl: RateLimit) -> bool:
+
+def check_rate_limit(rl: RateLimit) -> tuple[bool, float]:
     """
-    Return True if request is allowed; False if it should be rejected (429).
-    Uses Redis fixed-window counter; falls back to in-process memory if Redis is unavailable.
+    Return (allowed, retry_after_s). Rejected requests (429) get retry_after_s > 0.
+
+    Token bucket: up to `limit` requests in a burst, refilled at limit/window_s
+    per second. Uses one EVALSHA against Redis; falls back to in-process memory
+    if Redis is unavailable.
     """
     ip = _client_ip()
-    now = time.time()
-    redis_key = _fixed_window_key(rl, ip=ip, now=now)
+    now_ms = time.time() * 1000.0
+    redis_key = _bucket_key(rl, ip=ip)
+    capacity = float(rl.limit)
+    rate_per_ms = capacity / (rl.window_s * 1000.0)
 
     try:
         r = get_redis()
-        # Atomic-ish fixed-window increment
-        n = int(r.incr(redis_key))
-        if n == 1:
-            r.expire(redis_key, rl.window_s + 5)
-        return n <= rl.limit
+        allowed, wait_ms = _token_bucket_script(r)(
+            keys=[redis_key], args=[capacity, rate_per_ms, int(now_ms), 1], client=r
+        )
+        return bool(allowed), int(wait_ms) / 1000.0
     except Exception:  # noqa: BLE001
-        # Fallback: in-memory fixed window (per-process)
+        # Fallback: same bucket, per-process
         store = current_app.extensions.setdefault("_rate_limit_mem", {})  # type: ignore[assignment]
-        # store: dict[str, tuple[bucket:int, count:int]]
-        bucket = int(now // rl.window_s)
-        b, c = store.get(redis_key, (bucket, 0))
-        if b != bucket:
-            c = 0
-        c += 1
-        store[redis_key] = (bucket, c)
-        return c <= rl.limit
+        # store: dict[str, tuple[tokens:float, last_refill_ms:float]]
+        tokens, ts = store.get(redis_key, (capacity, now_ms))
+        if now_ms > ts:
+            tokens = min(capacity, tokens + (now_ms - ts) * rate_per_ms)
+            ts = now_ms
+        if tokens >= 1:
+            store[redis_key] = (tokens - 1, ts)
+            return True, 0.0
+        store[redis_key] = (tokens, ts)
+        return False, (1 - tokens) / rate_per_ms / 1000.0
 
 
 def rate_limited(rl: RateLimit | Callable[[], RateLimit]):
     def decorator(fn):
         def wrapped(*args, **kwargs):
             resolved = rl() if callable(rl) else rl
-            if not check_rate_limit(resolved):
-                return jsonify({"message": "Too many requests. Please slow down."}), 429
+            allowed, retry_after_s = check_rate_limit(resolved)
+            if not allowed:
+                resp = current_app.response_class(_TOO_MANY_REQUESTS_BODY, status=429, mimetype="application/json")
+                resp.headers["Retry-After"] = str(max(1, math.ceil(retry_after_s)))
+                return resp
             return fn(*args, **kwargs)
 
         wrapped.__name__ = getattr(fn, "__name__", "wrapped")
@@ -1,90 +1,106 @@
 import os
 import re
 import time
-import uuid
 import hashlib
 import hmac
 import secrets
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterable
 
-from flask import Blueprint, current_app, jsonify, request, send_from_directory, url_for
+import orjson
+
+from flask import Blueprint, current_app, jsonify, request, send_file, url_for
 from werkzeug.utils import secure_filename
 from PyPDF2 import PdfReader
 
-from .config import Config
+from .config import get_runtime_config
 from .jobs_store import atomic_write_json, create_job_record, enqueue_job, get_job_paths, read_json
-from .queue import get_queue
+from .pdf_scan import scan_page_count
+from .queue import get_redis
 from .rate_limit import RateLimit, rate_limited
+from .uploads import UPLOAD_FILE_MODE
 
 main = Blueprint("main", __name__)
 
 
 def allowed_file(filename: str) -> bool:
-    allowed = current_app.config.get("ALLOWED_EXTENSIONS", Config.ALLOWED_EXTENSIONS)
-    return "." in filename and filename.rsplit(".", 1)[1].lower() in allowed
+    _base, dot, ext = filename.rpartition(".")
+    return bool(dot) and ext.lower() in get_runtime_config().allowed_extensions
 
 
-def _sha256_hex(value: str) -> str:
-    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+@lru_cache(maxsize=256)
+def _json_message_body(message: str) -> bytes:
+    return orjson.dumps({"message": message})
 
 
-def _job_ttl_s() -> int:
-    ttl = current_app.config.get("JOB_TTL_S", getattr(Config, "JOB_TTL_S", 3600))
-    try:
-        ttl_i = int(ttl)
-    except Exception:
-        ttl_i = 3600
-    return max(60, ttl_i)  # never less than 60s
+def _json_message(message: str, status: int):
+    """
+    {"message": ...} error response. Messages come from a small fixed set, so
+    their serialized bodies are cached instead of re-encoded on every request.
+    """
+    return current_app.response_class(_json_message_body(message), status=status, mimetype="application/json")
 
 
-def _delete_output_after_download() -> bool:
-    return bool(current_app.config.get("DELETE_OUTPUT_AFTER_DOWNLOAD", getattr(Config, "DELETE_OUTPUT_AFTER_DOWNLOAD", True)))
+def _sha256_hex(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
 
 
-def _job_is_expired(job: dict) -> bool:
-    created_at = job.get("created_at")
+def _token_matches(token: str, expected_hash: str) -> bool:
+    """
+    Constant-time check of a download token against its stored hash.
+    Deliberately not memoized: a cache would keep live tokens in memory.
+    """
+    if not token or not expected_hash:
+        return False
     try:
-        created_ts = float(created_at)
-    except Exception:
+        expected = bytes.fromhex(expected_hash)
+    except ValueError:
         return False
-    return (time.time() - created_ts) > _job_ttl_s()
-
+    # Compare the 32 raw digest bytes rather than 64 hex characters.
+    return hmac.compare_digest(hashlib.sha256(token.encode("utf-8")).digest(), expected)
 
-def _cleanup_job_artifacts(*, job_file: Path, job: dict) -> None:
-    # Best-effort removal of output file + job record.
-    try:
-        upload_dir = Path(current_app.config["UPLOAD_FOLDER"])
-        output_filename = str(job.get("output_filename") or "").strip()
-        if output_filename:
-            out_path = upload_dir / output_filename
-            try:
-                out_path.unlink(missing_ok=True)
-            except Exception:
-                pass
-    except Exception:
-        pass
 
-    try:
-        job_file.unlink(missing_ok=True)
-    except Exception:
-        pass
+def _delete_output_after_download() -> bool:
+    return get_runtime_config().delete_output_after_download
 
 
 def _load_job_or_404(job_id: str):
     paths = get_job_paths()
     job_file = paths.job_file(job_id)
     if not job_file.is_file():
-        return None, job_file, (jsonify({"message": "Job not found."}), 404)
+        return None, job_file, _json_message("Job not found.", 404)
 
-    job = read_json(job_file)
-    if _job_is_expired(job):
-        _cleanup_job_artifacts(job_file=job_file, job=job)
-        return None, job_file, (jsonify({"message": "Job expired."}), 404)
+    # Expired jobs are removed by the background sweeper (see expiry.py); one may
+    # disappear between the stat above and this read.
+    try:
+        job = read_json(job_file)
+    except FileNotFoundError:
+        return None, job_file, _json_message("Job not found.", 404)
 
     return job, job_file, None
 
 
-def _clean_pages(pages_raw: str | None) -> list[str]:
+# translate() table that deletes every character valid in a page selection.
+_PAGES_ALLOWED_CHARS = str.maketrans("", "", "0123456789,- \t\n\r\f\v")
+_PAGE_RANGE_RE = re.compile(r"(\d+)-(\d+)")
+# Absolute ceiling for any page number, far above MAX_PDF_PAGES.
+_MAX_PAGE_NUMBER = 1_000_000
+_MAX_PAGE_DIGITS = len(str(_MAX_PAGE_NUMBER))
+
+
+def _page_number(digits: str) -> int:
+    # Length check first: int() on a huge digit string is itself expensive.
+    n = int(digits) if len(digits.lstrip("0")) <= _MAX_PAGE_DIGITS else _MAX_PAGE_NUMBER + 1
+    if n > _MAX_PAGE_NUMBER:
+        raise ValueError(f"Page numbers must be at most {_MAX_PAGE_NUMBER}.")
+    if n < 1:
+        raise ValueError("Pages must be positive numbers.")
+    return n
+
+
+def _clean_pages(pages_raw: str | None, *, max_count: int | None = None) -> list[str]:
     """
     Normalize page input into a clean list of positive integers as strings.
 
@@ -92,6 +108,9 @@ def _clean_pages(pages_raw: str | None) -> list[str]:
     - Comma or whitespace separated values: "1,2,3" or "1 2 3"
     - Ranges: "2-6" (inclusive)
     - Mixed: "1,3,5-8"
+
+    Raises as soon as more than `max_count` distinct pages are selected, so a
+    range like "1-1000000" is rejected without being expanded.
     """
     if not pages_raw:
         return []
@@ -100,35 +119,37 @@ def _clean_pages(pages_raw: str | None) -> list[str]:
     if not raw:
         return []
 
-    tokens = [t for t in re.split(r"[,\s]+", raw) if t]
+    # Reject anything outside digits/separators up front (a single C-level pass).
+    if raw.translate(_PAGES_ALLOWED_CHARS):
+        raise ValueError('Pages must be numbers and ranges (e.g. "1,3,5-8").')
+
+    # str.split() (no args) splits on whitespace and drops empty pieces, so this
+    # handles "1,2", "1 2" and "1, 2" without a regex pass.
+    tokens = [t for part in raw.split(",") for t in part.split()]
     pages_out: list[str] = []
-    seen: set[str] = set()
+    seen: set[int] = set()
+    limit = _MAX_PAGE_NUMBER if max_count is None else max_count
 
     def add_page(n: int) -> None:
-        if n < 1:
-            raise ValueError("Pages must be positive numbers.")
-        s = str(n)
-        if s not in seen:
-            pages_out.append(s)
-            seen.add(s)
+        if n not in seen:
+            if len(pages_out) >= limit:
+                raise ValueError(f"Too many pages selected (max {limit}).")
+            seen.add(n)
+            pages_out.append(str(n))
 
     for token in tokens:
-        token = token.strip()
-        if not token:
-            continue
-
         if token.isdigit():
-            add_page(int(token))
+            add_page(_page_number(token))
             continue
 
-        m = re.fullmatch(r"(\d+)-(\d+)", token)
+        m = _PAGE_RANGE_RE.fullmatch(token)
         if m:
-            start = int(m.group(1))
-            end = int(m.group(2))
-            if start < 1 or end < 1:
-                raise ValueError("Pages must be positive numbers.")
+            start = _page_number(m.group(1))
+            end = _page_number(m.group(2))
             if end < start:
                 raise ValueError('Ranges must be ascending (e.g. "2-6").')
+            # At most `limit` new pages fit and at most len(seen) are repeats,
+            # so this loop is bounded no matter how wide the range is.
             for n in range(start, end + 1):
                 add_page(n)
             continue
@@ -139,7 +160,7 @@ def _clean_pages(pages_raw: str | None) -> list[str]:
 
 
 def _make_output_name(prefix: str = "output", *, ext: str = "pdf") -> str:
-    return f"{prefix}_{uuid.uuid4().hex}.{ext}"
+    return f"{prefix}_{secrets.token_hex(16)}.{ext}"
 
 
 def _clean_output_name(raw: str | None, *, default_base: str) -> str:
@@ -182,7 +203,6 @@ def _ensure_real_pdf_and_count_pages(upload) -> int:
     try:
         upload.stream.seek(0)
         prefix = upload.stream.read(1024)
-        upload.stream.seek(0)
     except Exception as exc:  # noqa: BLE001
         raise ValueError("Unreadable upload stream.") from exc
 
@@ -190,8 +210,16 @@ def _ensure_real_pdf_and_count_pages(upload) -> int:
         raise ValueError("File is not a valid PDF.")
 
     try:
-        reader = PdfReader(upload.stream)
-        num_pages = len(reader.pages)
+        # Most uploads have a plain xref table; read /Count straight from the
+        # page tree and only build a PdfReader when that isn't possible.
+        # Both seek on their own; `finally` rewinds for _save_upload.
+        try:
+            num_pages = scan_page_count(upload.stream)
+        except Exception:  # noqa: BLE001
+            num_pages = None
+        if num_pages is None:
+            reader = PdfReader(upload.stream)
+            num_pages = len(reader.pages)
     except Exception as exc:  # noqa: BLE001
         raise ValueError("File is not a valid PDF.") from exc
     finally:
@@ -206,7 +234,52 @@ def _ensure_real_pdf_and_count_pages(upload) -> int:
 
 
 def _uuid_pdf_name() -> str:
-    return f"{uuid.uuid4().hex}.pdf"
+    return f"{secrets.token_hex(16)}.pdf"
+
+
+def _unlink_all(paths: Iterable[Path]) -> None:
+    # Best-effort removal; already-missing or undeletable files are ignored.
+    for p in paths:
+        try:
+            os.unlink(p)
+        except OSError:
+            pass
+
+
+def _save_upload(upload, path: Path, *, chunk_size: int) -> str:
+    """
+    Persist an upload at `path` and return the SHA-256 (hex) of its bytes.
+
+    Large uploads are already spooled into UPLOAD_FOLDER and hashed while being
+    parsed (see UploadRequest), so they are just hardlinked into place.
+    Otherwise copy the stream in large chunks, hashing as it is written;
+    FileStorage.save() copies 16KB at a time and PDFs are usually several MB.
+    Safe to call from a worker thread (no app context needed).
+    """
+    stream = upload.stream
+    spooled_name = getattr(stream, "name", None)
+    if isinstance(spooled_name, str) and Path(spooled_name).parent == path.parent:
+        try:
+            stream.flush()
+            # Same permissions as the copy path below, whichever branch runs.
+            os.fchmod(stream.fileno(), UPLOAD_FILE_MODE)
+            os.link(spooled_name, path)
+            spool_digest = getattr(stream, "sha256", None)
+            if spool_digest is not None:
+                return spool_digest.hexdigest()
+            stream.seek(0)
+            return hashlib.file_digest(stream, "sha256").hexdigest()
+        except OSError:
+            # e.g. filesystem without hardlinks; fall back to copying.
+            path.unlink(missing_ok=True)
+            stream.seek(0)
+
+    digest = hashlib.sha256()
+    with open(path, "wb", buffering=0) as out:
+        while chunk := stream.read(chunk_size):
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
 
 
 @main.route("/health")
@@ -217,8 +290,8 @@ def health():
 @main.route("/jobs", methods=["POST"])
 @rate_limited(lambda: RateLimit(
     key="jobs_post",
-    limit=int(current_app.config.get("RATE_LIMIT_JOBS_PER_WINDOW", Config.RATE_LIMIT_JOBS_PER_WINDOW)),
-    window_s=int(current_app.config.get("RATE_LIMIT_WINDOW_S", Config.RATE_LIMIT_WINDOW_S)),
+    limit=get_runtime_config().rate_limit_jobs_per_window,
+    window_s=get_runtime_config().rate_limit_window_s,
 ))
 def create_job():
     """
@@ -226,66 +299,61 @@ def create_job():
     Important: this endpoint must NOT run PDF logic directly.
     It validates, saves uploads, enqueues, and returns job_id.
     """
-    upload_dir = Path(current_app.config["UPLOAD_FOLDER"])
+    cfg = get_runtime_config()
+    upload_dir = cfg.upload_dir
     operation = (request.form.get("operation") or "").strip().lower()
     pages_raw = request.form.get("pages")
 
     if operation not in {"swap", "merge", "keep", "remove"}:
-        return jsonify({"message": "Please choose a valid operation."}), 400
-
-    try:
-        pages = _clean_pages(pages_raw)
-    except ValueError as exc:
-        return jsonify({"message": str(exc)}), 400
+        return _json_message("Please choose a valid operation.", 400)
 
-    max_operation_pages = int(current_app.config.get("MAX_OPERATION_PAGES", Config.MAX_OPERATION_PAGES))
-    if operation in {"keep", "remove"} and len(pages) > max_operation_pages:
-        return jsonify({"message": f"Too many pages selected (max {max_operation_pages})."}), 400
+    # Merge combines whole files and ignores any page selection, so it isn't
+    # parsed (or limited) at all. Swap never needs more than MAX_OPERATION_PAGES
+    # either; its exactly-two check below still applies.
+    pages: list[str] = []
+    if operation != "merge":
+        try:
+            pages = _clean_pages(pages_raw, max_count=cfg.max_operation_pages)
+        except ValueError as exc:
+            return _json_message(str(exc), 400)
 
     # Validate page requirements for non-merge operations
     if operation != "merge" and not pages:
-        return jsonify({"message": "Provide at least one page number for this operation."}), 400
+        return _json_message("Provide at least one page number for this operation.", 400)
     if operation == "swap" and len(pages) != 2:
-        return jsonify({"message": "Swap requires exactly two page numbers."}), 400
+        return _json_message("Swap requires exactly two page numbers.", 400)
 
     # User-facing output name (download filename) - validate early to avoid orphaned uploads.
     try:
         output_download_name = _clean_output_name(request.form.get("output_name"), default_base="output")
     except ValueError as exc:
-        return jsonify({"message": str(exc)}), 400
+        return _json_message(str(exc), 400)
 
     # Save uploads (validate real PDF + enforce page limits)
     input_filenames: list[str] = []
     saved_paths: list[Path] = []
-    max_pdf_pages = int(current_app.config.get("MAX_PDF_PAGES", Config.MAX_PDF_PAGES))
-    max_merge_files = int(current_app.config.get("MAX_MERGE_FILES", Config.MAX_MERGE_FILES))
-    max_merge_total_pages = int(current_app.config.get("MAX_MERGE_TOTAL_PAGES", Config.MAX_MERGE_TOTAL_PAGES))
+    max_pdf_pages = cfg.max_pdf_pages
+    max_merge_files = cfg.max_merge_files
+    max_merge_total_pages = cfg.max_merge_total_pages
 
     if operation == "merge":
         merge_files = request.files.getlist("file")
         if not merge_files or all(f.filename == "" for f in merge_files):
-            return jsonify({"message": "Please select PDF files to merge."}), 400
+            return _json_message("Please select PDF files to merge.", 400)
         if len([f for f in merge_files if f and f.filename != ""]) > max_merge_files:
-            return jsonify({"message": f"Too many files (max {max_merge_files})."}), 400
+            return _json_message(f"Too many files (max {max_merge_files}).", 400)
 
         total_pages = 0
         # Only consider non-empty uploads, and keep a stable index so the UI can
         # highlight a specific file on validation errors.
         effective_merge_files = [f for f in merge_files if f and f.filename != ""]
+        # Cheap filename check across all files before parsing any of them.
         for upload_index, upload in enumerate(effective_merge_files):
-
-            try:
-                pages_in_file = _ensure_real_pdf_and_count_pages(upload)
-            except ValueError as exc:
-                for p in saved_paths:
-                    try:
-                        p.unlink(missing_ok=True)
-                    except Exception:
-                        pass
+            if not allowed_file(upload.filename or ""):
                 return (
                     jsonify(
                         {
-                            "message": str(exc),
+                            "message": "Only PDF files are allowed.",
                             "invalid_file": upload.filename,
                             "invalid_index": upload_index,
                         }
@@ -293,64 +361,97 @@ def create_job():
                     400,
                 )
 
-            if pages_in_file > max_pdf_pages:
-                for p in saved_paths:
-                    try:
-                        p.unlink(missing_ok=True)
-                    except Exception:
-                        pass
-                return jsonify({"message": f"PDF exceeds max pages ({max_pdf_pages})."}), 400
-
-            total_pages += pages_in_file
-            if total_pages > max_merge_total_pages:
-                for p in saved_paths:
-                    try:
-                        p.unlink(missing_ok=True)
-                    except Exception:
-                        pass
-                return jsonify({"message": f"Merged PDF exceeds max total pages ({max_merge_total_pages})."}), 400
-
+        for _upload in effective_merge_files:
             stored = _uuid_pdf_name()
-            path = upload_dir / stored
-            upload.save(str(path))
-            saved_paths.append(path)
+            saved_paths.append(upload_dir / stored)
             input_filenames.append(stored)
 
+        # Request body is already fully buffered, so parsing and writing the
+        # files are independent per upload and can overlap.
+        chunk_size = cfg.upload_copy_chunk
+        parallelism = cfg.merge_save_parallelism
+        with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(effective_merge_files)))) as pool:
+            # Validate every upload before writing anything, so a rejected merge
+            # never touches the disk. Results are checked in submission order so
+            # the reported invalid_index is the first bad file, as before.
+            page_counts = [pool.submit(_ensure_real_pdf_and_count_pages, u) for u in effective_merge_files]
+            for upload_index, (upload, page_count) in enumerate(zip(effective_merge_files, page_counts)):
+                try:
+                    pages_in_file = page_count.result()
+                except ValueError as exc:
+                    for f in page_counts:
+                        f.cancel()
+                    return (
+                        jsonify(
+                            {
+                                "message": str(exc),
+                                "invalid_file": upload.filename,
+                                "invalid_index": upload_index,
+                            }
+                        ),
+                        400,
+                    )
+
+                error = None
+                if pages_in_file > max_pdf_pages:
+                    error = f"PDF exceeds max pages ({max_pdf_pages})."
+                else:
+                    total_pages += pages_in_file
+                    if total_pages > max_merge_total_pages:
+                        error = f"Merged PDF exceeds max total pages ({max_merge_total_pages})."
+                if error:
+                    for f in page_counts:
+                        f.cancel()
+                    return _json_message(error, 400)
+
+            try:
+                input_sha256 = list(
+                    pool.map(
+                        lambda pair: _save_upload(pair[0], pair[1], chunk_size=chunk_size),
+                        zip(effective_merge_files, saved_paths),
+                    )
+                )
+            except Exception:
+                _unlink_all(saved_paths)
+                raise
+
         if not input_filenames:
-            return jsonify({"message": "No valid PDF files found."}), 400
+            return _json_message("No valid PDF files found.", 400)
     else:
         if "file" not in request.files:
-            return jsonify({"message": "No file found in request."}), 400
+            return _json_message("No file found in request.", 400)
 
         file = request.files["file"]
         if file.filename == "":
-            return jsonify({"message": "No file selected."}), 400
+            return _json_message("No file selected.", 400)
         if not file:
-            return jsonify({"message": "No file selected."}), 400
+            return _json_message("No file selected.", 400)
+        if not allowed_file(file.filename or ""):
+            return _json_message("Only PDF files are allowed.", 400)
 
         try:
             num_pages = _ensure_real_pdf_and_count_pages(file)
         except ValueError as exc:
-            return jsonify({"message": str(exc)}), 400
+            return _json_message(str(exc), 400)
 
         if num_pages > max_pdf_pages:
-            return jsonify({"message": f"PDF exceeds max pages ({max_pdf_pages})."}), 400
+            return _json_message(f"PDF exceeds max pages ({max_pdf_pages}).", 400)
 
         if pages:
             try:
                 max_requested = max(int(p) for p in pages)
             except Exception:
-                return jsonify({"message": "Invalid pages."}), 400
+                return _json_message("Invalid pages.", 400)
             if max_requested > num_pages:
-                return jsonify({"message": f"Page selection exceeds PDF page count ({num_pages})."}), 400
+                return _json_message(f"Page selection exceeds PDF page count ({num_pages}).", 400)
 
         stored = _uuid_pdf_name()
         path = upload_dir / stored
-        file.save(str(path))
+        input_sha256 = [_save_upload(file, path, chunk_size=cfg.upload_copy_chunk)]
         saved_paths.append(path)
         input_filenames.append(stored)
 
-    job_id = uuid.uuid4().hex
+    job_id = secrets.token_hex(16)
 
     # One-time download token (returned only once, not stored in plaintext).
     download_token = secrets.token_urlsafe(32)
@@ -363,6 +464,7 @@ def create_job():
         job_id=job_id,
         operation=operation,
         input_filenames=input_filenames,
+        input_sha256=input_sha256,
         output_filename=output_filename,
         output_download_name=output_download_name,
         pages=pages,
@@ -370,35 +472,51 @@ def create_job():
     )
     enqueue_job(job)
 
-    # Enqueue to Redis/RQ. Worker runs the PDF logic.
-    try:
-        q = get_queue()
-        q.enqueue("tasks.process_job", job_id, job_timeout=int(current_app.config["RQ_JOB_TIMEOUT_S"]))
-    except Exception:  # noqa: BLE001
-        current_app.logger.exception("Failed to enqueue job to RQ.")
-        # Best-effort cleanup: remove saved uploads and job record.
-        for p in saved_paths:
-            try:
-                p.unlink(missing_ok=True)
-            except Exception:
-                pass
-        try:
-            paths = get_job_paths()
-            paths.job_file(job_id).unlink(missing_ok=True)
-        except Exception:
-            pass
-        return jsonify({"message": "Queue unavailable. Try again later."}), 503
+    # Enqueue to Redis/RQ off the request thread (see dispatch.py). Worker runs
+    # the PDF logic; if the queue is unreachable the job flips to status "error".
+    current_app.extensions["quickpdf_dispatcher"].submit(
+        job_id,
+        timeout_s=cfg.rq_job_timeout_s,
+        input_paths=[str(p) for p in saved_paths],
+    )
 
-    return jsonify({"job_id": job_id, "download_token": download_token}), 202
+    return (
+        jsonify(
+            {
+                "job_id": job_id,
+                "download_token": download_token,
+                # Relative, like download_url, so it works behind proxies.
+                "status_url": url_for("main.get_job", job_id=job_id, _external=False),
+            }
+        ),
+        202,
+    )
 
 
 @main.route("/jobs/<job_id>", methods=["GET"])
 @rate_limited(lambda: RateLimit(
     key="jobs_get",
-    limit=int(current_app.config.get("RATE_LIMIT_POLL_PER_WINDOW", Config.RATE_LIMIT_POLL_PER_WINDOW)),
-    window_s=int(current_app.config.get("RATE_LIMIT_WINDOW_S", Config.RATE_LIMIT_WINDOW_S)),
+    limit=get_runtime_config().rate_limit_poll_per_window,
+    window_s=get_runtime_config().rate_limit_window_s,
 ))
 def get_job(job_id: str):
+    # Validator for conditional polls, taken from a stat before the read: every
+    # record write is a rename (new inode), so an unchanged file means an
+    # unchanged job. Finished jobs also carry the Redis download count.
+    job_file = get_job_paths().job_file(job_id)
+    try:
+        etag = _job_file_etag(os.stat(job_file))
+    except FileNotFoundError:
+        return _json_message("Job not found.", 404)
+
+    if_none_match = request.headers.get("If-None-Match") or ""
+    if if_none_match.startswith(etag[:-1]):
+        if if_none_match == etag or if_none_match == _done_job_etag(etag, _download_stats(job_id)):
+            resp = current_app.response_class(status=304)
+            resp.headers["ETag"] = if_none_match
+            resp.headers["Cache-Control"] = "no-cache"
+            return resp
+
     job, _job_file, err = _load_job_or_404(job_id)
     if err:
         return err
@@ -407,16 +525,22 @@ def get_job(job_id: str):
     if status == "done":
         # Return a relative path so it always works behind proxies (nginx on :8080, etc).
         job["download_url"] = url_for("main.download_job_result", job_id=job_id, _external=False)
+        stats = _download_stats(job_id)
+        _overlay_download_stats(job, stats)
+        etag = _done_job_etag(etag, stats)
     # Never return token/hash to callers.
     job.pop("download_token_hash", None)
-    return jsonify(job)
+    resp = jsonify(job)
+    resp.headers["ETag"] = etag
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
 
 
 @main.route("/jobs/<job_id>/download", methods=["GET"])
 @rate_limited(lambda: RateLimit(
     key="jobs_download",
-    limit=int(current_app.config.get("RATE_LIMIT_DOWNLOAD_PER_WINDOW", Config.RATE_LIMIT_DOWNLOAD_PER_WINDOW)),
-    window_s=int(current_app.config.get("RATE_LIMIT_WINDOW_S", Config.RATE_LIMIT_WINDOW_S)),
+    limit=get_runtime_config().rate_limit_download_per_window,
+    window_s=get_runtime_config().rate_limit_window_s,
 ))
 def download_job_result(job_id: str):
     job, job_file, err = _load_job_or_404(job_id)
@@ -427,24 +551,51 @@ def download_job_result(job_id: str):
     # Require download token (query param or header).
     token = (request.args.get("token") or "").strip() or (request.headers.get("X-Download-Token") or "").strip()
     if not token:
-        return jsonify({"message": "Missing download token."}), 403
+        return _json_message("Missing download token.", 403)
     expected_hash = str(job.get("download_token_hash") or "").strip()
-    if not expected_hash or not hmac.compare_digest(_sha256_hex(token), expected_hash):
-        return jsonify({"message": "Invalid download token."}), 403
+    if not _token_matches(token, expected_hash):
+        return _json_message("Invalid download token.", 403)
 
     status = str(job.get("status") or "").strip()
     if status != "done":
-        return jsonify({"message": "Job is not complete yet."}), 409
+        return _json_message("Job is not complete yet.", 409)
 
     output_filename = str(job.get("output_filename") or "").strip()
     download_name = str(job.get("output_download_name") or output_filename).strip() or output_filename
     if not output_filename:
-        return jsonify({"message": "Job has no output."}), 500
-
-    upload_dir = current_app.config["UPLOAD_FOLDER"]
-    file_path = os.path.join(upload_dir, output_filename)
-    if not os.path.isfile(file_path):
-        return jsonify({"message": "Output file not found."}), 404
+        return _json_message("Job has no output.", 500)
+
+    cfg = get_runtime_config()
+    file_path = os.path.join(cfg.upload_dir, output_filename)
+
+    if cfg.use_xaccel:
+        # nginx serves the bytes (sendfile, Range, conditional GETs) from its
+        # internal location; we only authorize and name the download.
+        if not os.path.isfile(file_path):
+            return _json_message("Output file not found.", 404)
+        resp = current_app.response_class(mimetype="application/pdf")
+        resp.headers["X-Accel-Redirect"] = f"{cfg.xaccel_prefix}{output_filename}"
+        resp.headers.set("Content-Disposition", "attachment", filename=download_name)
+        resp.headers["Cache-Control"] = "no-cache"
+        _record_download(job, job_file)
+        return resp
+
+    # file_path is built from our own job record (not user input), so send it directly.
+    # conditional=True serves pdf.js Range requests as 206 slices, and the file body
+    # goes through wsgi.file_wrapper when the server provides one.
+    # send_file stats the file itself; a missing output surfaces as FileNotFoundError.
+    try:
+        resp = send_file(
+            file_path,
+            mimetype="application/pdf",
+            as_attachment=True,
+            download_name=download_name,
+            conditional=True,
+            etag=True,
+            max_age=0,
+        )
+    except FileNotFoundError:
+        return _json_message("Output file not found.", 404)
 
     # Some clients (like react-pdf) will issue multiple requests (range/metadata)
     # for previewing. We support a "consume" flag for the user-initiated download
@@ -452,19 +603,69 @@ def download_job_result(job_id: str):
     # Multi-download support:
     # - Valid token can download multiple times until TTL expiry.
     # - We keep best-effort stats only (no one-time consumption).
+    _record_download(job, job_file)
+
+    return resp
+
+
+def _job_stats_key(job_id: str) -> str:
+    return f"jobstats:{job_id}"
+
+
+def _record_download(job: dict, job_file: Path) -> None:
+    """
+    Bump best-effort download stats in Redis (one pipelined round trip) instead of
+    rewriting the job record. Falls back to the record if Redis is unavailable.
+    """
+    now = time.time()
+    key = _job_stats_key(str(job.get("job_id") or job_file.stem))
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hincrby(key, "downloads", 1)
+        pipe.hset(key, "downloaded_at", now)
+        pipe.expire(key, get_runtime_config().job_ttl_s)
+        pipe.execute()
+        return
+    except Exception:  # noqa: BLE001
+        pass
+
     downloads = int(job.get("downloads") or 0)
     job["downloads"] = downloads + 1
-    job["downloaded_at"] = time.time()
-    job["updated_at"] = time.time()
+    job["downloaded_at"] = now
+    job["updated_at"] = now
     atomic_write_json(job_file, job)
 
-    return send_from_directory(upload_dir, output_filename, as_attachment=True, download_name=download_name)
+
+def _download_stats(job_id: str) -> dict[bytes, bytes]:
+    # Redis-held stats written by _record_download ({} if none or Redis is down).
+    try:
+        return get_redis().hgetall(_job_stats_key(job_id)) or {}
+    except Exception:  # noqa: BLE001
+        return {}
+
+
+def _overlay_download_stats(job: dict, stats: dict[bytes, bytes]) -> None:
+    # Merge Redis-held stats over the ones in the record.
+    if not stats:
+        return
+    job["downloads"] = int(job.get("downloads") or 0) + int(stats.get(b"downloads") or 0)
+    downloaded_at = float(stats.get(b"downloaded_at") or 0) or None
+    if downloaded_at and downloaded_at > float(job.get("downloaded_at") or 0):
+        job["downloaded_at"] = downloaded_at
+
+
+def _job_file_etag(st: os.stat_result) -> str:
+    return f'W/"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def _done_job_etag(file_etag: str, stats: dict[bytes, bytes]) -> str:
+    return f'{file_etag[:-1]}-d{int(stats.get(b"downloads") or 0)}"'
 
 
 @main.route("/upload", methods=["POST"])
 def upload_file():
     # Legacy endpoint: kept to avoid confusing 404s, but no longer supported since the worker
     # is now an RQ worker (not an HTTP processing service).
-    return jsonify({"message": "This endpoint is deprecated. Use POST /api/jobs instead."}), 410
+    return _json_message("This endpoint is deprecated. Use POST /api/jobs instead.", 410)
 
 
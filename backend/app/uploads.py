@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from typing import IO, Any
+
+from flask import Request
+from werkzeug.formparser import FormDataParser, MultiPartParser, default_stream_factory
+
+from .config import get_runtime_config
+
+# Same threshold Werkzeug uses before spooling an upload to disk.
+_SPOOL_MAX_SIZE = 500 * 1024
+
+# Prefix for in-flight upload temp files inside UPLOAD_FOLDER.
+UPLOAD_TMP_PREFIX = ".upload-"
+
+
+def _current_umask() -> int:
+    # os.umask() can only be read by setting it; done once at import, before
+    # any request threads exist.
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# Mode a plain open(path, "wb") gives saved uploads. NamedTemporaryFile creates
+# its spool as 0600, so it is set to this before being linked into place.
+UPLOAD_FILE_MODE = 0o666 & ~_current_umask()
+
+
+class UploadFormDataParser(FormDataParser):
+    """
+    FormDataParser that feeds the multipart decoder larger reads.
+
+    Werkzeug reads the body in fixed 64KB chunks and runs the boundary search
+    once per chunk; for multi-MB PDFs a bigger chunk means far fewer trips
+    through the Python-level parse loop. Mirrors FormDataParser._parse_multipart
+    with only buffer_size added.
+    """
+
+    def __init__(self, *args: Any, buffer_size: int, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.buffer_size = buffer_size
+
+    def _parse_multipart(self, stream, mimetype, content_length, options):  # type: ignore[override]
+        parser = MultiPartParser(
+            stream_factory=self.stream_factory,
+            max_form_memory_size=self.max_form_memory_size,
+            max_form_parts=self.max_form_parts,
+            cls=self.cls,
+            buffer_size=self.buffer_size,
+        )
+        boundary = options.get("boundary", "").encode("ascii")
+
+        if not boundary:
+            raise ValueError("Missing boundary")
+
+        form, files = parser.parse(stream, boundary, content_length)
+        return stream, form, files
+
+
+class HashingSpoolFile:
+    """
+    Spool temp file that feeds every byte the multipart parser writes into a
+    SHA-256, so saving the upload later needs no extra pass to hash it.
+    Everything except write() is delegated to the wrapped temp file.
+    """
+
+    def __init__(self, file: IO[bytes]) -> None:
+        self._file = file
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self.sha256.update(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    """
+    Request class that spools large multipart files into UPLOAD_FOLDER itself.
+
+    Werkzeug's default puts them in the system temp dir, so saving an upload
+    meant copying every byte a second time. With the temp file already on the
+    same filesystem, routes can hardlink it into place instead (see _save_upload).
+    The temp file is still deleted when the request closes its files, and it
+    hashes its contents as they are written (see HashingSpoolFile).
+    """
+
+    def make_form_data_parser(self) -> FormDataParser:
+        buffer_size = get_runtime_config().upload_parse_chunk
+        max_form_memory_size = self.max_form_memory_size
+        if max_form_memory_size is not None:
+            # The decoder rejects a single read that would push its buffer past
+            # max_form_memory_size, so stay well under it.
+            buffer_size = min(buffer_size, max_form_memory_size // 2)
+        return UploadFormDataParser(
+            stream_factory=self._get_file_stream,
+            max_form_memory_size=max_form_memory_size,
+            max_content_length=self.max_content_length,
+            max_form_parts=self.max_form_parts,
+            cls=self.parameter_storage_class,
+            buffer_size=max(buffer_size, 64 * 1024),
+        )
+
+    def _get_file_stream(
+        self,
+        total_content_length: int | None,
+        content_type: str | None,
+        filename: str | None = None,
+        content_length: int | None = None,
+    ) -> IO[bytes]:
+        if total_content_length is None or total_content_length > _SPOOL_MAX_SIZE:
+            return HashingSpoolFile(  # type: ignore[return-value]
+                tempfile.NamedTemporaryFile(
+                    mode="w+b",
+                    dir=get_runtime_config().upload_dir,
+                    prefix=UPLOAD_TMP_PREFIX,
+                    suffix=".part",
+                )
+            )
+        return default_stream_factory(
+            total_content_length=total_content_length,
+            content_type=content_type,
+            filename=filename,
+            content_length=content_length,
+        )
@@ -0,0 +1,13 @@
+import multiprocessing
+import os
+
+# Gunicorn settings for the backend API (see Dockerfile CMD).
+#
+# Uploads, Redis calls, and file downloads are all I/O-bound, so use gevent
+# workers: each worker process serves many requests concurrently instead of
+# queueing them behind one sync handler. Gunicorn's gevent worker applies
+# gevent's monkey patching itself before the app is loaded.
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent")
+workers = int(os.environ.get("GUNICORN_WORKERS", str(max(2, multiprocessing.cpu_count()))))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "100"))
@@ -0,0 +1,26 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The backend image runs from /app with `app` as a top-level package.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import app as app_package  # noqa: E402
+from app.config import Config  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(Config, "UPLOAD_FOLDER", str(tmp_path / "uploads"))
+    monkeypatch.setattr(Config, "JOBS_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(Config, "CORS_ORIGINS", "")
+    # Nothing listens here; tests that need Redis install a fake client.
+    monkeypatch.setattr(Config, "REDIS_URL", "redis://127.0.0.1:1/0")
+    monkeypatch.setattr(Config, "REDIS_SOCKET_TIMEOUT_S", 0.2)
+    # Tests drive the sweeper / dispatcher directly instead of via threads.
+    monkeypatch.setattr(app_package, "start_expiry_sweeper", lambda app: None)
+    monkeypatch.setattr(app_package, "start_enqueue_dispatcher", lambda app: None)
+    flask_app = app_package.create_app()
+    flask_app.config["TESTING"] = True
+    return flask_app
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import pytest
+
+import app as app_package
+from app.config import Config
+
+ORIGIN = "https://quick-pdf.netlify.app"
+PREFLIGHT_HEADERS = {"Origin": ORIGIN, "Access-Control-Request-Method": "POST"}
+
+
+@pytest.fixture
+def allow_list_app(app, monkeypatch: pytest.MonkeyPatch):
+    # `app` has patched Config/threads already; build a second app with an allow-list.
+    monkeypatch.setattr(Config, "CORS_ORIGINS", ORIGIN)
+    return app_package.create_app()
+
+
+def test_wildcard_preflight_is_not_cached_by_intermediaries(app) -> None:
+    resp = app.test_client().options("/api/jobs", headers=PREFLIGHT_HEADERS)
+    assert resp.headers["Access-Control-Allow-Origin"] == "*"
+    assert resp.headers["Cache-Control"] == "no-store"
+
+
+def test_allow_list_preflight(allow_list_app) -> None:
+    resp = allow_list_app.test_client().options("/api/jobs", headers=PREFLIGHT_HEADERS)
+    assert resp.headers["Access-Control-Allow-Origin"] == ORIGIN
+    assert resp.headers["Cache-Control"] == "no-store"
+    vary = {v.strip() for v in resp.headers["Vary"].split(",")}
+    assert {"Origin", "Access-Control-Request-Method", "Access-Control-Request-Headers"} <= vary
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app import dispatch
+from app.config import get_runtime_config
+from app.dispatch import EnqueueDispatcher
+from app.jobs_store import create_job_record, enqueue_job, get_job_paths, read_json
+
+
+class StubQueue:
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.calls = 0
+        self.enqueued: list[SimpleNamespace] = []
+
+    def enqueue_many(self, job_datas):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("redis down")
+        self.enqueued.extend(job_datas)
+        return []
+
+
+@pytest.fixture
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    slept: list[float] = []
+    monkeypatch.setattr(dispatch, "time", SimpleNamespace(time=time.time, sleep=slept.append))
+    return slept
+
+
+def _queue(monkeypatch: pytest.MonkeyPatch, *, failures: int) -> StubQueue:
+    queue = StubQueue(failures)
+    monkeypatch.setattr(dispatch, "get_queue", lambda: queue)
+    return queue
+
+
+def _accept_job(app, job_id: str) -> tuple[Path, list[Path]]:
+    # What create_job() leaves behind before it hands the job to the dispatcher.
+    with app.app_context():
+        upload_dir = get_runtime_config().upload_dir
+        inputs = [upload_dir / f"{job_id}_in{i}.pdf" for i in range(2)]
+        for p in inputs:
+            p.write_bytes(b"%PDF-1.4\n")
+        enqueue_job(
+            create_job_record(
+                job_id=job_id,
+                operation="merge",
+                input_filenames=[p.name for p in inputs],
+                output_filename=f"{job_id}_output.pdf",
+                output_download_name="output.pdf",
+                pages=None,
+                download_token_hash="00" * 32,
+            )
+        )
+        return get_job_paths().job_file(job_id), inputs
+
+
+def _submit(dispatcher: EnqueueDispatcher, job_id: str, inputs: list[Path]) -> None:
+    dispatcher.submit(job_id, timeout_s=180, input_paths=[str(p) for p in inputs])
+
+
+def test_marks_job_failed_when_redis_stays_down(app, monkeypatch: pytest.MonkeyPatch, sleeps: list[float]) -> None:
+    queue = _queue(monkeypatch, failures=99)
+    job_file, inputs = _accept_job(app, "job1")
+    dispatcher = EnqueueDispatcher(app)
+
+    _submit(dispatcher, "job1", inputs)
+    dispatcher.flush()
+
+    assert queue.calls == dispatch._ENQUEUE_ATTEMPTS
+    assert len(sleeps) == dispatch._ENQUEUE_ATTEMPTS - 1
+    job = read_json(job_file)
+    assert job["status"] == "error"
+    assert job["error_message"] == "Queue unavailable. Try again later."
+    assert not any(p.exists() for p in inputs)
+
+
+def test_retry_success_enqueues_each_job_once(app, monkeypatch: pytest.MonkeyPatch, sleeps: list[float]) -> None:
+    queue = _queue(monkeypatch, failures=1)
+    jobs = {job_id: _accept_job(app, job_id) for job_id in ("job1", "job2")}
+    dispatcher = EnqueueDispatcher(app)
+
+    for job_id, (_job_file, inputs) in jobs.items():
+        _submit(dispatcher, job_id, inputs)
+    dispatcher.flush()
+
+    assert queue.calls == 2
+    assert len(sleeps) == 1
+    # One batch on the second attempt, each job exactly once.
+    assert [data.args for data in queue.enqueued] == [("job1",), ("job2",)]
+    with app.app_context():
+        job_ttl_s = get_runtime_config().job_ttl_s
+    for data in queue.enqueued:
+        assert data.func == "tasks.process_job"
+        assert (data.timeout, data.result_ttl, data.failure_ttl) == (180, 0, job_ttl_s)
+
+    for job_file, inputs in jobs.values():
+        job = read_json(job_file)
+        assert job["status"] == "queued"
+        assert job["error_message"] is None
+        assert all(p.exists() for p in inputs)
+
+    # Nothing left behind to be dispatched (or failed) later.
+    dispatcher.flush()
+    assert queue.calls == 2
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import time
+
+import pytest
+
+from app.config import get_runtime_config
+from app.jobs_store import atomic_write_json, create_job_record, enqueue_job, get_job_paths, read_json
+
+TOKEN = "test-download-token"
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _create_job(app, job_id: str, *, status: str = "queued"):
+    with app.app_context():
+        job = create_job_record(
+            job_id=job_id,
+            operation="keep",
+            input_filenames=[f"{job_id}_in.pdf"],
+            output_filename=f"{job_id}_output.pdf",
+            output_download_name="output.pdf",
+            pages=["1"],
+            download_token_hash=hashlib.sha256(TOKEN.encode()).hexdigest(),
+        )
+        job["status"] = status
+        enqueue_job(job)
+        (get_runtime_config().upload_dir / job["output_filename"]).write_bytes(b"%PDF-1.4\n%%EOF\n")
+        return get_job_paths().job_file(job_id)
+
+
+def _rewrite(app, job_file, **changes) -> None:
+    # Same path the worker and the download fallback take: temp file + rename.
+    with app.app_context():
+        job = read_json(job_file)
+        job.update(changes, updated_at=time.time())
+        atomic_write_json(job_file, job)
+
+
+def _poll(client, job_id: str, etag: str | None = None):
+    headers = {"If-None-Match": etag} if etag else {}
+    return client.get(f"/api/jobs/{job_id}", headers=headers)
+
+
+@pytest.fixture
+def fake_redis(app):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # rate-limit script on the download route
+    app.extensions["redis"] = fakeredis.FakeRedis()
+    return app.extensions["redis"]
+
+
+@pytest.mark.parametrize("status", ["queued", "done"])
+def test_unchanged_job_is_304(app, client, fake_redis, status: str) -> None:
+    _create_job(app, "job1", status=status)
+    first = _poll(client, "job1")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = _poll(client, "job1", etag)
+    assert again.status_code == 304
+    assert again.get_data() == b""
+    assert again.headers["ETag"] == etag
+    assert again.headers["Cache-Control"] == "no-cache"
+
+
+def test_rewritten_record_is_200(app, client, fake_redis) -> None:
+    job_file = _create_job(app, "job1")
+    queued = _poll(client, "job1")
+    assert queued.get_json()["status"] == "queued"
+
+    _rewrite(app, job_file, status="done")
+
+    resp = _poll(client, "job1", queued.headers["ETag"])
+    assert resp.status_code == 200
+    assert resp.get_json()["status"] == "done"
+    assert resp.headers["ETag"] != queued.headers["ETag"]
+    assert _poll(client, "job1", resp.headers["ETag"]).status_code == 304
+
+
+def test_download_changes_done_job_etag(app, client, fake_redis) -> None:
+    job_file = _create_job(app, "job1", status="done")
+    before = _poll(client, "job1")
+    assert before.get_json()["downloads"] == 0
+    stat_before = job_file.stat()
+
+    download = client.get(f"/api/jobs/job1/download?token={TOKEN}")
+    assert download.status_code == 200
+    download.close()
+    # The count went to Redis; the record file itself is untouched.
+    assert job_file.stat().st_ino == stat_before.st_ino
+    assert job_file.stat().st_mtime_ns == stat_before.st_mtime_ns
+
+    resp = _poll(client, "job1", before.headers["ETag"])
+    assert resp.status_code == 200
+    assert resp.get_json()["downloads"] == 1
+    assert resp.headers["ETag"] != before.headers["ETag"]
+    assert _poll(client, "job1", resp.headers["ETag"]).status_code == 304
+
+
+def test_download_without_redis_changes_etag(app, client) -> None:
+    # Redis unreachable: the download count is written into the record instead.
+    _create_job(app, "job1", status="done")
+    before = _poll(client, "job1")
+
+    download = client.get(f"/api/jobs/job1/download?token={TOKEN}")
+    assert download.status_code == 200
+    download.close()
+
+    resp = _poll(client, "job1", before.headers["ETag"])
+    assert resp.status_code == 200
+    assert resp.get_json()["downloads"] == 1
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app import routes
+from app.pdf_scan import scan_page_count
+
+
+def _entry(offset: int, eol: bytes, kind: bytes = b"n", gen: int = 0) -> bytes:
+    # Classic xref entries are exactly 20 bytes including the 2-byte EOL.
+    return b"%010d %05d %s" % (offset, gen, kind) + eol
+
+
+def _objects(num_pages: int, *, count: bytes | None = None) -> dict[int, bytes]:
+    kids = b" ".join(b"%d 0 R" % (3 + i) for i in range(num_pages))
+    count = b"%d" % num_pages if count is None else count
+    objs = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [%s] /Count %s >>" % (kids, count),
+    }
+    for i in range(num_pages):
+        objs[3 + i] = b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 200 200] >>"
+    return objs
+
+
+def _write_objects(out: bytearray, objects: dict[int, bytes], eol: bytes) -> dict[int, int]:
+    offsets = {}
+    for num in sorted(objects):
+        offsets[num] = len(out)
+        out += b"%d 0 obj" % num + eol + objects[num] + eol + b"endobj" + eol
+    return offsets
+
+
+def _classic_pdf(
+    objects: dict[int, bytes],
+    *,
+    eol: bytes = b"\n",
+    entry_eol: bytes | None = None,
+    trailer_extra: bytes = b"",
+) -> bytes:
+    entry_eol = entry_eol or (b" \n" if eol == b"\n" else b"\r\n")
+    out = bytearray(b"%PDF-1.4" + eol)
+    offsets = _write_objects(out, objects, eol)
+    size = max(objects) + 1
+    xref_at = len(out)
+    out += b"xref" + eol + b"0 %d" % size + eol + _entry(0, entry_eol, b"f", 65535)
+    for num in range(1, size):
+        out += _entry(offsets[num], entry_eol) if num in offsets else _entry(0, entry_eol, b"f")
+    out += b"trailer" + eol + b"<< /Size %d /Root 1 0 R%s >>" % (size, trailer_extra) + eol
+    out += b"startxref" + eol + b"%d" % xref_at + eol + b"%%EOF" + eol
+    return bytes(out)
+
+
+def _incremental_update(base: bytes) -> bytes:
+    # Append a third page: rewrite the page tree (obj 2) and add obj 6.
+    base_xref = int(base.rsplit(b"startxref", 1)[1].split()[0])
+    out = bytearray(base)
+    objs = _objects(3)
+    objs[2] = b"<< /Type /Pages /Kids [3 0 R 4 0 R 6 0 R] /Count 3 >>"
+    offsets = _write_objects(out, {2: objs[2], 6: objs[5]}, b"\n")
+    xref_at = len(out)
+    out += b"xref\n0 1\n" + _entry(0, b" \n", b"f", 65535)
+    out += b"2 1\n" + _entry(offsets[2], b" \n") + b"6 1\n" + _entry(offsets[6], b" \n")
+    out += b"trailer\n<< /Size 7 /Root 1 0 R /Prev %d >>\n" % base_xref
+    out += b"startxref\n%d\n%%%%EOF\n" % xref_at
+    return bytes(out)
+
+
+def _object_stream_pdf(num_pages: int) -> bytes:
+    # Catalog and page tree inside an /ObjStm, indexed by an (unfiltered) xref stream.
+    objs = _objects(num_pages)
+    out = bytearray(b"%PDF-1.5\n")
+    page_nums = list(range(3, 3 + num_pages))
+    offsets = _write_objects(out, {n: objs[n] for n in page_nums}, b"\n")
+    body = objs[1] + b"\n" + objs[2]
+    header = b"1 0 2 %d " % (len(objs[1]) + 1)
+    stm_num, xref_num = 3 + num_pages, 4 + num_pages
+    offsets[stm_num] = len(out)
+    out += b"%d 0 obj\n<< /Type /ObjStm /N 2 /First %d /Length %d >>\nstream\n" % (
+        stm_num,
+        len(header),
+        len(header + body),
+    )
+    out += header + body + b"\nendstream\nendobj\n"
+    xref_at = len(out)
+    rows = [b"\x00\x00\x00\xff", b"\x02" + stm_num.to_bytes(2, "big") + b"\x00", b"\x02" + stm_num.to_bytes(2, "big") + b"\x01"]
+    rows += [b"\x01" + offsets[n].to_bytes(2, "big") + b"\x00" for n in page_nums + [stm_num]]
+    rows.append(b"\x01" + xref_at.to_bytes(2, "big") + b"\x00")
+    data = b"".join(rows)
+    out += b"%d 0 obj\n<< /Type /XRef /Size %d /W [1 2 1] /Root 1 0 R /Length %d >>\nstream\n" % (
+        xref_num,
+        xref_num + 1,
+        len(data),
+    )
+    out += data + b"\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n" % xref_at
+    return bytes(out)
+
+
+def _linearized_pdf(num_pages: int) -> bytes:
+    # Linearized layout: the first-page xref table (whose trailer has /Prev) sits
+    # at the front and the final startxref points back at it, while the trailer
+    # at the end of the file belongs to the main table.
+    objs = _objects(num_pages)
+    size = 3 + num_pages
+    lin_num = size
+    head = b"%PDF-1.4\n"
+    lin_obj = b"%d 0 obj\n<< /Linearized 1 /N %d >>\nendobj\n" % (lin_num, num_pages)
+    first_xref_at = len(head) + len(lin_obj)
+
+    def first_table(prev: int) -> bytes:
+        rows = b"xref\n1 %d\n" % (size - 1) + b"".join(_entry(offs[n], b" \n") for n in range(1, size))
+        rows += b"%d 1\n" % lin_num + _entry(len(head), b" \n")
+        return rows + b"trailer\n<< /Size %d /Root 1 0 R /Prev %010d >>\n" % (size + 1, prev)
+
+    offs = {n: 0 for n in range(1, size)}
+    table_len = len(first_table(0))
+    body = bytearray()
+    for n in range(1, size):
+        offs[n] = first_xref_at + table_len + len(body)
+        body += b"%d 0 obj\n%s\nendobj\n" % (n, objs[n])
+    main_xref_at = first_xref_at + table_len + len(body)
+    out = head + lin_obj + first_table(main_xref_at) + bytes(body)
+    out += b"xref\n0 1\n" + _entry(0, b" \n", b"f", 65535)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size + 1, first_xref_at)
+    return out
+
+
+def _scan(data: bytes) -> int | None:
+    return scan_page_count(io.BytesIO(data))
+
+
+@pytest.mark.parametrize("num_pages", [1, 3, 25])
+def test_classic_xref_counts_pages(num_pages: int) -> None:
+    assert _scan(_classic_pdf(_objects(num_pages))) == num_pages
+
+
+def test_crlf_line_endings() -> None:
+    assert _scan(_classic_pdf(_objects(4), eol=b"\r\n")) == 4
+
+
+def test_small_trailing_junk_after_eof() -> None:
+    assert _scan(_classic_pdf(_objects(2)) + b"\n% junk appended by a mailer\n") == 2
+
+
+def test_uses_root_count_of_nested_page_tree() -> None:
+    objs = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 5 >>",
+        3: b"<< /Type /Pages /Parent 2 0 R /Kids [5 0 R 6 0 R] /Count 2 >>",
+        4: b"<< /Type /Pages /Parent 2 0 R /Kids [7 0 R 8 0 R 9 0 R] /Count 3 >>",
+    }
+    for n in range(5, 10):
+        objs[n] = b"<< /Type /Page /Parent %d 0 R >>" % (3 if n < 7 else 4)
+    assert _scan(_classic_pdf(objs)) == 5
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        pytest.param(_object_stream_pdf(3), id="object-streams"),
+        pytest.param(_incremental_update(_classic_pdf(_objects(2))), id="prev-chain"),
+        pytest.param(_classic_pdf(_objects(3), trailer_extra=b" /Encrypt 9 0 R"), id="encrypt"),
+        pytest.param(_linearized_pdf(3), id="linearized"),
+        pytest.param(b"GARBAGE-BEFORE-HEADER\n" + _classic_pdf(_objects(3)), id="preamble-junk"),
+        pytest.param(_classic_pdf(_objects(3)) + b"x" * 5000, id="trailing-junk-past-tail"),
+        pytest.param(_classic_pdf(_objects(25), entry_eol=b"\r\r\n"), id="21-byte-xref-entries"),
+        pytest.param(
+            _classic_pdf({**_objects(3, count=b"9 0 R"), 9: b"3"}),
+            id="indirect-count",
+        ),
+        pytest.param(_classic_pdf(_objects(3))[:-12], id="truncated-tail"),
+        pytest.param(_classic_pdf(_objects(3))[:200], id="truncated-body"),
+    ],
+)
+def test_gives_up(data: bytes) -> None:
+    assert _scan(data) is None
+
+
+def _upload(data: bytes) -> FileStorage:
+    return FileStorage(stream=io.BytesIO(data), filename="in.pdf", content_type="application/pdf")
+
+
+@pytest.fixture
+def reader_calls(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    calls: list[int] = []
+    real_reader = routes.PdfReader
+
+    def counting_reader(*args, **kwargs):
+        calls.append(1)
+        return real_reader(*args, **kwargs)
+
+    monkeypatch.setattr(routes, "PdfReader", counting_reader)
+    return calls
+
+
+def test_validation_uses_scanner_for_classic_files(reader_calls: list[int]) -> None:
+    assert routes._ensure_real_pdf_and_count_pages(_upload(_classic_pdf(_objects(3)))) == 3
+    assert reader_calls == []
+
+
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        pytest.param(_incremental_update(_classic_pdf(_objects(2))), 3, id="prev-chain"),
+        pytest.param(_object_stream_pdf(3), 3, id="object-streams"),
+        pytest.param(_linearized_pdf(3), 3, id="linearized"),
+    ],
+)
+def test_validation_falls_back_to_pdfreader(reader_calls: list[int], data: bytes, expected: int) -> None:
+    upload = _upload(data)
+    assert routes._ensure_real_pdf_and_count_pages(upload) == expected
+    assert reader_calls == [1]
+    # Rewound for _save_upload.
+    assert upload.stream.tell() == 0
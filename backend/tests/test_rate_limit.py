@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from app import rate_limit
+from app.rate_limit import RateLimit, rate_limited
+
+LIMIT = 3
+WINDOW_S = 60  # one token back every 20 s
+BODY = b'{"message":"Too many requests. Please slow down."}'
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(time=clock))
+    return clock
+
+
+@pytest.fixture
+def redis_down(monkeypatch: pytest.MonkeyPatch) -> None:
+    def unavailable():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(rate_limit, "get_redis", unavailable)
+
+
+@pytest.fixture
+def client(app):
+    for key in ("a", "b"):
+
+        def view(key=key) -> str:
+            return key
+
+        app.add_url_rule(f"/api/limited/{key}", f"limited_{key}", rate_limited(RateLimit(key=key, limit=LIMIT, window_s=WINDOW_S))(view))
+    return app.test_client()
+
+
+def _get(client, key: str = "a", ip: str = "203.0.113.1"):
+    return client.get(f"/api/limited/{key}", headers={"X-Forwarded-For": ip})
+
+
+def _statuses(client, n: int, **kwargs) -> list[int]:
+    return [_get(client, **kwargs).status_code for _ in range(n)]
+
+
+@pytest.mark.usefixtures("redis_down")
+def test_burst_up_to_capacity(client, clock: Clock) -> None:
+    assert _statuses(client, LIMIT + 1) == [200] * LIMIT + [429]
+
+
+@pytest.mark.usefixtures("redis_down")
+def test_rejection_body_and_retry_after(client, clock: Clock) -> None:
+    _statuses(client, LIMIT)
+    resp = _get(client)
+    assert resp.status_code == 429
+    assert resp.mimetype == "application/json"
+    assert resp.get_data() == BODY
+    assert resp.headers["Retry-After"] == "20"
+
+    clock.advance(15)
+    assert _get(client).headers["Retry-After"] == "5"
+    clock.advance(4.9)
+    # Rounded up, never 0.
+    assert _get(client).headers["Retry-After"] == "1"
+
+
+@pytest.mark.usefixtures("redis_down")
+def test_refills_at_limit_per_window(client, clock: Clock) -> None:
+    _statuses(client, LIMIT)
+    clock.advance(19.9)
+    assert _get(client).status_code == 429
+    clock.advance(0.1)
+    assert _statuses(client, 2) == [200, 429]
+
+    # Rejected requests don't consume tokens; two intervals refill two.
+    clock.advance(40)
+    assert _statuses(client, 3) == [200, 200, 429]
+
+    # Idle time only refills up to capacity.
+    clock.advance(10 * WINDOW_S)
+    assert _statuses(client, LIMIT + 1) == [200] * LIMIT + [429]
+
+
+@pytest.mark.usefixtures("redis_down")
+def test_buckets_are_per_name_and_ip(client, clock: Clock) -> None:
+    assert _statuses(client, LIMIT + 1, key="a", ip="203.0.113.1")[-1] == 429
+    assert _get(client, key="b", ip="203.0.113.1").status_code == 200
+    assert _get(client, key="a", ip="203.0.113.2").status_code == 200
+    assert _get(client, key="a", ip="203.0.113.1").status_code == 429
+
+
+def _run_schedule(client, clock: Clock) -> list[tuple[int, str | None]]:
+    # Same steps for both backends: burst, partial and full refills, an idle
+    # period, and a second caller.
+    steps = [0, 0, 0, 0, 7.5, 12.5, 0, 33.333, 6.667, 0, 0, 600, 0, 0, 0, 0]
+    seen = []
+    for i, dt in enumerate(steps):
+        clock.advance(dt)
+        resp = _get(client, ip="203.0.113.9" if i == 10 else "203.0.113.1")
+        seen.append((resp.status_code, resp.headers.get("Retry-After")))
+    return seen
+
+
+def test_memory_fallback_matches_lua(app, client, clock: Clock, monkeypatch: pytest.MonkeyPatch) -> None:
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+
+    app.extensions["redis"] = fakeredis.FakeRedis()
+    redis_results = _run_schedule(client, clock)
+    key = rate_limit._bucket_key(RateLimit(key="a", limit=LIMIT, window_s=WINDOW_S), ip="203.0.113.1")
+    # Bucket state lives in one hash that expires once it would be full again.
+    assert 0 < app.extensions["redis"].pttl(key) <= WINDOW_S * 1000 + 1000
+
+    app.extensions.pop("_rate_limit_mem", None)
+    clock.now = Clock().now
+
+    def unavailable():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(rate_limit, "get_redis", unavailable)
+    assert _run_schedule(client, clock) == redis_results
+    assert [status for status, _ in redis_results].count(429) >= 3
@@ -1,12 +1,34 @@
 from __future__ import annotations
 
-import json
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
 from typing import Any
 
-from PyPDF2 import PdfReader, PdfWriter
+import orjson
+import pikepdf
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).strip() not in {"0", "false", "False", "no", "NO"}
+
+
+# Read when this module is imported. RQ runs every job in a work horse forked
+# from its worker, so the Dockerfile imports tasks in the `rq worker-pool` parent
+# (-c worker_settings); workers and horses are forked from it and inherit these
+# instead of re-reading them per job. Job file names are joined on lexically.
+_UPLOADS_DIR = Path(os.environ.get("UPLOAD_FOLDER", "/data/uploads")).resolve()
+_JOBS_DIR = Path(os.environ.get("JOBS_DIR", "/data/jobs")).resolve()
+_MAX_PDF_PAGES = int(os.environ.get("MAX_PDF_PAGES", "200"))
+_MAX_MERGE_TOTAL_PAGES = int(os.environ.get("MAX_MERGE_TOTAL_PAGES", "400"))
+_MAX_MERGE_FILES = int(os.environ.get("MAX_MERGE_FILES", "10"))
+_MAX_OPERATION_PAGES = int(os.environ.get("MAX_OPERATION_PAGES", "50"))
+_CLEANUP_INPUTS = _env_flag("CLEANUP_INPUTS", "1")
+# Optional intermediate "processing" record write; no client distinguishes it
+# from "queued", so by default each job writes only its terminal status.
+_WRITE_PROCESSING_STATUS = _env_flag("WRITE_PROCESSING_STATUS", "0")
 
 
 def _now_ts() -> float:
@@ -14,126 +36,137 @@ def _now_ts() -> float:
 
 
 def _atomic_write_json(path: Path, payload: dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
+    # Only ever rewrites an existing record, so JOBS_DIR is known to exist.
+    # Same layout as the backend's jobs_store writer, whichever side wrote last.
     tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
     tmp.replace(path)
 
 
 def _read_job(job_file: Path) -> dict[str, Any]:
-    return json.loads(job_file.read_text(encoding="utf-8"))
+    return orjson.loads(job_file.read_bytes())
 
 
 def _resolve_filename_under(root: Path, filename: str) -> Path:
-    if not filename or "/" in filename or "\\" in filename:
-        raise ValueError("Invalid filename.")
-    p = (root / filename).resolve()
-    root = root.resolve()
-    if root not in p.parents and p != root:
+    # Purely lexical: a bare file name (no separators, not "." or "..") joined
+    # onto an already-resolved root cannot point outside it.
+    if not filename or "/" in filename or "\\" in filename or "\0" in filename or filename in {".", ".."}:
         raise ValueError("Invalid filename.")
-    return p
-
-
-def _swap_pages(input_path: Path, output_path: Path, pages: list[str]) -> None:
-    pages_to_swap = [int(p) - 1 for p in pages]
-    with input_path.open("rb") as f:
-        reader = PdfReader(f)
-        writer = PdfWriter()
-
-        swapped = {
-            pages_to_swap[0]: reader.pages[pages_to_swap[1]],
-            pages_to_swap[1]: reader.pages[pages_to_swap[0]],
-        }
-
-        for i in range(len(reader.pages)):
-            writer.add_page(swapped.get(i, reader.pages[i]))
-
-        with output_path.open("wb") as out:
-            writer.write(out)
-
-
-def _max_pdf_pages() -> int:
-    return int(os.environ.get("MAX_PDF_PAGES", "200"))
-
-
-def _max_merge_total_pages() -> int:
-    return int(os.environ.get("MAX_MERGE_TOTAL_PAGES", "400"))
-
-
-def _max_merge_files() -> int:
-    return int(os.environ.get("MAX_MERGE_FILES", "10"))
-
-
-def _max_operation_pages() -> int:
-    return int(os.environ.get("MAX_OPERATION_PAGES", "50"))
-
-
-def _pdf_num_pages(path: Path) -> int:
-    with path.open("rb") as f:
-        reader = PdfReader(f)
-        return len(reader.pages)
-
-
-def _keep_pages(input_path: Path, output_path: Path, pages: list[str]) -> None:
-    pages_to_keep = {int(p) - 1 for p in pages}
-    with input_path.open("rb") as f:
-        reader = PdfReader(f)
-        writer = PdfWriter()
-
-        if len(pages_to_keep) > len(reader.pages):
+    return root / filename
+
+
+def _open_pdf(path: Path) -> pikepdf.Pdf:
+    # Map the input instead of reading it through a stream; qpdf seeks all over
+    # the file (xref, object streams). Inputs are private to their job and never
+    # change while open. Falls back to stream access if mapping fails.
+    return pikepdf.open(path, access_mode=pikepdf.AccessMode.mmap)
+
+
+def _save_pdf(pdf: pikepdf.Pdf, output_path: Path) -> None:
+    # Object streams pack the copied objects into compressed streams (smaller
+    # output, one xref stream). StreamDecodeLevel.none copies every stream's
+    # encoded bytes through instead of decoding and re-compressing them.
+    pdf.save(
+        output_path,
+        linearize=False,
+        object_stream_mode=pikepdf.ObjectStreamMode.generate,
+        stream_decode_level=pikepdf.StreamDecodeLevel.none,
+    )
+
+
+# Swap keeps every page, so it edits the opened source's page tree in place
+# and saves it under the output name. src must not be reused afterwards.
+def _swap_pages(src: pikepdf.Pdf, output_path: Path, pages_idx: list[int]) -> None:
+    a, b = pages_idx
+    src.pages[a], src.pages[b] = src.pages[b], src.pages[a]
+
+    _save_pdf(src, output_path)
+
+
+# Keep/remove copy the surviving pages into a new document rather than deleting
+# from src: the source's outline, named destinations and link annotations can
+# still reference a deleted page, which would carry its content into the output.
+# A foreign page copy doesn't follow references to pages that aren't copied
+# (qpdf nulls them), so only the selected pages are written.
+def _keep_pages(src: pikepdf.Pdf, output_path: Path, pages_idx: list[int]) -> None:
+    pages_to_keep = set(pages_idx)
+    with pikepdf.new() as out:
+        if len(pages_to_keep) > len(src.pages):
             raise ValueError("Number of pages to retain is more than number of pages in PDF")
 
-        for i in range(len(reader.pages)):
-            if i in pages_to_keep:
-                writer.add_page(reader.pages[i])
+        # Touch only the kept pages, in document order.
+        out.pages.extend(src.pages[i] for i in sorted(pages_to_keep))
 
-        with output_path.open("wb") as out:
-            writer.write(out)
+        _save_pdf(out, output_path)
 
 
-def _remove_pages(input_path: Path, output_path: Path, pages: list[str]) -> None:
-    pages_to_remove = {int(p) - 1 for p in pages}
-    with input_path.open("rb") as f:
-        reader = PdfReader(f)
-        writer = PdfWriter()
-
-        if len(pages_to_remove) > len(reader.pages):
+def _remove_pages(src: pikepdf.Pdf, output_path: Path, pages_idx: list[int]) -> None:
+    pages_to_remove = set(pages_idx)
+    with pikepdf.new() as out:
+        if len(pages_to_remove) > len(src.pages):
             raise ValueError("Number of pages to delete is more than number of pages in PDF")
 
-        for i in range(len(reader.pages)):
-            if i not in pages_to_remove:
-                writer.add_page(reader.pages[i])
+        out.pages.extend(page for i, page in enumerate(src.pages) if i not in pages_to_remove)
 
-        with output_path.open("wb") as out:
-            writer.write(out)
+        _save_pdf(out, output_path)
 
 
 def _merge_pdfs(input_paths: list[Path], output_path: Path) -> None:
-    writer = PdfWriter()
-    max_pdf_pages = _max_pdf_pages()
-    max_total = _max_merge_total_pages()
+    max_pdf_pages = _MAX_PDF_PAGES
+    max_total = _MAX_MERGE_TOTAL_PAGES
     total = 0
-    for p in input_paths:
-        with p.open("rb") as f:
-            reader = PdfReader(f)
-            n = len(reader.pages)
+    # Copied pages reference their source documents until save(), so every
+    # input stays open until the output is written.
+    with ExitStack() as stack:
+        out = stack.enter_context(pikepdf.new())
+        # Opening (read + xref parse) is independent per file, so overlap it;
+        # pages are still appended in upload order below.
+        with ThreadPoolExecutor(max_workers=min(len(input_paths), os.cpu_count() or 4)) as pool:
+            opening = [pool.submit(_open_pdf, p) for p in input_paths]
+        sources = []
+        errors = []
+        for fut in opening:
+            try:
+                sources.append(stack.enter_context(fut.result()))
+            except Exception as exc:  # noqa: BLE001
+                errors.append(exc)
+        if errors:
+            # Opened inputs are closed by the ExitStack; report the first failure.
+            raise errors[0]
+
+        for src in sources:
+            n = len(src.pages)
             if n > max_pdf_pages:
                 raise ValueError(f"PDF exceeds max pages ({max_pdf_pages}).")
             total += n
             if total > max_total:
                 raise ValueError(f"Merged PDF exceeds max total pages ({max_total}).")
-            for page in reader.pages:
-                writer.add_page(page)
+            out.pages.extend(src.pages)
 
-    with output_path.open("wb") as out:
-        writer.write(out)
+        _save_pdf(out, output_path)
 
 
-def _safe_unlink(path: Path) -> None:
+def _open_uploads_dir() -> int | None:
     try:
-        path.unlink(missing_ok=True)
-    except Exception:
-        # best-effort cleanup
+        return os.open(_UPLOADS_DIR, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return None
+
+
+# Opened at import (like the constants above) so forked work horses inherit it.
+_uploads_dir_fd = _open_uploads_dir()
+
+
+def _safe_unlink_upload(path: Path) -> None:
+    # Every path cleaned up here came from _resolve_filename_under(_UPLOADS_DIR, ...),
+    # so unlink the bare name relative to the uploads directory fd.
+    global _uploads_dir_fd
+    try:
+        if _uploads_dir_fd is None:
+            _uploads_dir_fd = os.open(_UPLOADS_DIR, os.O_RDONLY | os.O_DIRECTORY)
+        os.unlink(path.name, dir_fd=_uploads_dir_fd)
+    except OSError:
+        # best-effort cleanup (including already gone)
         pass
 
 
@@ -143,9 +176,8 @@ def process_job(job_id: str) -> None:
     Reads the job record from JOBS_DIR, processes PDFs under UPLOAD_FOLDER,
     and updates the job status/result.
     """
-    uploads_dir = Path(os.environ.get("UPLOAD_FOLDER", "/data/uploads")).resolve()
-    jobs_dir = Path(os.environ.get("JOBS_DIR", "/data/jobs")).resolve()
-    cleanup_inputs = os.environ.get("CLEANUP_INPUTS", "1").strip() not in {"0", "false", "False", "no", "NO"}
+    uploads_dir = _UPLOADS_DIR
+    jobs_dir = _JOBS_DIR
 
     job_file = jobs_dir / f"{job_id}.json"
     if not job_file.exists():
@@ -157,8 +189,9 @@ def process_job(job_id: str) -> None:
     output_filename = str(job.get("output_filename") or "").strip()
     input_filenames = job.get("input_filenames") or []
 
-    job.update({"status": "processing", "error_message": None, "updated_at": _now_ts()})
-    _atomic_write_json(job_file, job)
+    if _WRITE_PROCESSING_STATUS:
+        job.update({"status": "processing", "error_message": None, "updated_at": _now_ts()})
+        _atomic_write_json(job_file, job)
 
     # Resolve paths early so we can always cleanup (best-effort).
     output_path: Path | None = None
@@ -175,8 +208,8 @@ def process_job(job_id: str) -> None:
         output_path = _resolve_filename_under(uploads_dir, output_filename)
 
         if operation == "merge":
-            if len(input_filenames) > _max_merge_files():
-                raise ValueError(f"Too many files (max {_max_merge_files()}).")
+            if len(input_filenames) > _MAX_MERGE_FILES:
+                raise ValueError(f"Too many files (max {_MAX_MERGE_FILES}).")
             input_paths = [_resolve_filename_under(uploads_dir, str(name)) for name in input_filenames]
             _merge_pdfs(input_paths, output_path)
         else:
@@ -184,31 +217,37 @@ def process_job(job_id: str) -> None:
                 raise ValueError("Invalid pages.")
             if not pages:
                 raise ValueError("Missing pages.")
-            if operation in {"keep", "remove"} and len(pages) > _max_operation_pages():
-                raise ValueError(f"Too many pages selected (max {_max_operation_pages()}).")
+            if operation in {"keep", "remove"} and len(pages) > _MAX_OPERATION_PAGES:
+                raise ValueError(f"Too many pages selected (max {_MAX_OPERATION_PAGES}).")
 
             input_paths = [_resolve_filename_under(uploads_dir, str(input_filenames[0]))]
             input_path = input_paths[0]
 
-            # Enforce max PDF pages and validate selection is within range.
-            num_pages = _pdf_num_pages(input_path)
-            if num_pages > _max_pdf_pages():
-                raise ValueError(f"PDF exceeds max pages ({_max_pdf_pages()}).")
+            # Parse the selection once into 0-based indexes for the page ops.
             try:
-                max_requested = max(int(p) for p in pages)
+                pages_idx = [int(p) - 1 for p in pages]
             except Exception as exc:
                 raise ValueError("Invalid pages.") from exc
-            if max_requested > num_pages:
-                raise ValueError(f"Page selection exceeds PDF page count ({num_pages}).")
-
-            if operation == "swap":
-                if len(pages) != 2:
-                    raise ValueError("Swap requires exactly two pages.")
-                _swap_pages(input_path, output_path, pages)
-            elif operation == "keep":
-                _keep_pages(input_path, output_path, pages)
-            elif operation == "remove":
-                _remove_pages(input_path, output_path, pages)
+            if min(pages_idx) < 0:
+                raise ValueError("Invalid pages.")
+
+            # One open serves both validation and the page operation.
+            with _open_pdf(input_path) as src:
+                # Enforce max PDF pages and validate selection is within range.
+                num_pages = len(src.pages)
+                if num_pages > _MAX_PDF_PAGES:
+                    raise ValueError(f"PDF exceeds max pages ({_MAX_PDF_PAGES}).")
+                if max(pages_idx) + 1 > num_pages:
+                    raise ValueError(f"Page selection exceeds PDF page count ({num_pages}).")
+
+                if operation == "swap":
+                    if len(pages_idx) != 2:
+                        raise ValueError("Swap requires exactly two pages.")
+                    _swap_pages(src, output_path, pages_idx)
+                elif operation == "keep":
+                    _keep_pages(src, output_path, pages_idx)
+                elif operation == "remove":
+                    _remove_pages(src, output_path, pages_idx)
 
         job.update({"status": "done", "error_message": None, "updated_at": _now_ts()})
         _atomic_write_json(job_file, job)
@@ -217,12 +256,12 @@ def process_job(job_id: str) -> None:
         _atomic_write_json(job_file, job)
         # Cleanup partial output on failure (best-effort).
         if output_path is not None:
-            _safe_unlink(output_path)
+            _safe_unlink_upload(output_path)
         raise
     finally:
         # Always cleanup uploaded temp inputs (best-effort).
-        if cleanup_inputs:
+        if _CLEANUP_INPUTS:
             for p in input_paths:
-                _safe_unlink(p)
+                _safe_unlink_upload(p)
 
 
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# tasks.py is a top-level module in the worker image (/app), not a package.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pikepdf
+import pytest
+from pikepdf import Array, Dictionary, Name
+
+import tasks
+
+SECRET = b"SECRET_PAGE_2"
+
+
+def _make_input(path: Path) -> None:
+    # Three pages with unique content; page 2 is referenced from the outline
+    # and from two link annotations on page 1 (/Dest and a GoTo action).
+    pdf = pikepdf.new()
+    for i in range(3):
+        pdf.add_blank_page(page_size=(200, 200))
+        pdf.pages[i].Contents = pdf.make_stream(b"BT /F1 12 Tf (SECRET_PAGE_%d) Tj ET" % (i + 1))
+    page_2 = pdf.pages[1].obj
+
+    with pdf.open_outline() as outline:
+        outline.root.append(pikepdf.OutlineItem("Page 2", 1))
+
+    dest_link = Dictionary(Type=Name.Annot, Subtype=Name.Link, Rect=Array([0, 0, 10, 10]), Dest=Array([page_2, Name.Fit]))
+    action_link = Dictionary(
+        Type=Name.Annot,
+        Subtype=Name.Link,
+        Rect=Array([0, 0, 10, 10]),
+        A=Dictionary(S=Name.GoTo, D=Array([page_2, Name.Fit])),
+    )
+    pdf.pages[0].Annots = pdf.make_indirect(Array([pdf.make_indirect(dest_link), pdf.make_indirect(action_link)]))
+    pdf.save(path)
+
+
+def _contains(path: Path, needle: bytes) -> bool:
+    with pikepdf.open(path) as pdf:
+        return any(isinstance(obj, pikepdf.Stream) and needle in obj.read_bytes() for obj in pdf.objects)
+
+
+@pytest.mark.parametrize(
+    ("op", "pages_idx"),
+    [(tasks._remove_pages, [1]), (tasks._keep_pages, [0, 2])],
+)
+def test_dropped_page_content_is_not_written(tmp_path: Path, op, pages_idx: list[int]) -> None:
+    src_path = tmp_path / "in.pdf"
+    out_path = tmp_path / "out.pdf"
+    _make_input(src_path)
+    assert _contains(src_path, SECRET)
+
+    with pikepdf.open(src_path) as src:
+        op(src, out_path, pages_idx)
+
+    with pikepdf.open(out_path) as out:
+        assert len(out.pages) == 2
+    assert _contains(out_path, b"SECRET_PAGE_1")
+    assert _contains(out_path, b"SECRET_PAGE_3")
+    assert not _contains(out_path, SECRET)
+
+
+def test_swap_reorders_pages(tmp_path: Path) -> None:
+    src_path = tmp_path / "in.pdf"
+    out_path = tmp_path / "out.pdf"
+    _make_input(src_path)
+
+    with pikepdf.open(src_path) as src:
+        tasks._swap_pages(src, out_path, [0, 2])
+
+    with pikepdf.open(out_path) as out:
+        contents = [page.Contents.read_bytes() for page in out.pages]
+    assert [c.split(b"(")[1].split(b")")[0] for c in contents] == [b"SECRET_PAGE_3", b"SECRET_PAGE_2", b"SECRET_PAGE_1"]
+
+
+def test_job_record_matches_backend_format(tmp_path: Path) -> None:
+    # backend/app/jobs_store.py writes records indented with sorted keys; the
+    # worker rewrites the same files and must not flip their layout.
+    job_file = tmp_path / "job.json"
+    record = {"status": "done", "job_id": "abc", "output": {"pages": 2}}
+    tasks._atomic_write_json(job_file, record)
+
+    assert job_file.read_text() == '{\n  "job_id": "abc",\n  "output": {\n    "pages": 2\n  },\n  "status": "done"\n}'
+    assert tasks._read_job(job_file) == record
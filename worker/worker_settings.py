@@ -0,0 +1,9 @@
+"""
+RQ settings module for `rq worker-pool -c worker_settings` (see Dockerfile).
+
+Importing tasks here runs its module-level setup (env limits, resolved paths,
+the uploads dir fd) once in the pool parent. Pool workers and the work horse
+RQ forks for every job inherit it instead of importing tasks per job.
+"""
+
+import tasks  # noqa: F401